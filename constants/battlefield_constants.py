@@ -1,9 +1,12 @@
 """
 战地游戏相关常量
 """
-import random
+import functools
+import hashlib
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+from typing import Dict, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 
 
 class ImageUrls:
@@ -745,9 +748,12 @@ class ImageUrls:
     # 定义图片裁剪的通用参数
     COMMON_CLIP_PARAMS = {"x": 0, "y": 0, "width": 700}
 
-    @property
-    def DEFAULT_AVATAR(self):
-        return random.choice(self._DEFAULT_AVATAR_URLS)
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def get_default_avatar(seed: str) -> str:
+        """根据玩家名称等稳定标识选择默认头像，同一玩家每次得到同一张"""
+        digest = hashlib.md5(str(seed).lower().encode("utf-8")).digest()
+        return ImageUrls._DEFAULT_AVATAR_URLS[int.from_bytes(digest[:8], "big") % len(ImageUrls._DEFAULT_AVATAR_URLS)]
 
     # 错误图片修复URL
     ERROR_IMG = [
@@ -761,20 +767,62 @@ class ImageUrls:
 
     @classmethod
     def get_all_static_urls(cls) -> dict:
-        """获取所有静态图片URL映射"""
-        return {
+        """获取所有静态图片URL映射，值均为URL字符串"""
+        urls = {
+            "bf3_logo": cls.BF3_LOGO,
             "bf4_logo": cls.BF4_LOGO,
             "bf1_logo": cls.BF1_LOGO,
             "bfv_logo": cls.BFV_LOGO,
+            "bf3_banner": cls.BF3_BANNER,
             "bf4_banner": cls.BF4_BANNER,
             "bf1_banner": cls.BF1_BANNER,
             "bfv_banner": cls.BFV_BANNER,
             "bf2042_banner": cls.BF2042_BANNER,
-            "BF6_BANNER": cls.BF6_BANNER,
-            "default_avatar": cls.DEFAULT_AVATAR,
             "BF6_BACKGROUND": cls.BF6_BACKGROUND,
             "su_50": cls.SU_50
         }
+        for kit, url in cls.BF6_BANNER.items():
+            urls[f"bf6_banner_{kit}"] = url
+        for index, url in enumerate(cls._DEFAULT_AVATAR_URLS):
+            urls[f"default_avatar_{index}"] = url
+        for item in cls.ERROR_IMG:
+            urls[f"repair_{item['name']}"] = item["repair_url"]
+        return urls
+
+
+class LayoutHeights:
+    """列表页面的高度估算(像素)，宁可偏大，偏小会截掉内容"""
+    # Banner、标题和底部信息
+    LIST_FRAME = 440
+    # 无数据时的提示卡片
+    EMPTY_LIST = 80
+    # 单张卡片高度(含间距)
+    GT_WEAPON_CARD = 160
+    GT_WEAPON_CARD_BF4 = 115
+    GT_VEHICLE_CARD = 125
+    BTR_WEAPON_CARD = 165
+    BTR_VEHICLE_CARD = 140
+    # 士兵卡片与载具卡片布局相同，少一行分类
+    BTR_SOLDIER_CARD = 140
+
+    # 武器/载具/士兵列表每页的数量
+    LIST_PAGE_SIZE = 20
+    # 页面高度上限，分页后的列表远低于这个值
+    MAX_PAGE_HEIGHT = 10000
+
+    @classmethod
+    def list_page(cls, card_height: int, count: int, max_height: int = MAX_PAGE_HEIGHT) -> int:
+        """
+        估算列表页面的高度
+        Args:
+            card_height: 单张卡片高度
+            count: 卡片数量
+            max_height: 高度上限
+        Returns:
+            页面高度
+        """
+        content = card_height * count if count else cls.EMPTY_LIST
+        return min(cls.LIST_FRAME + content, max_height)
 
 
 class BackgroundColors:
@@ -831,44 +879,96 @@ class GameMappings:
 
 
 class TemplateConstants:
-    """模板常量类"""
+    """模板常量类
+
+    每个模板目录共用一个Jinja2环境，模板在第一次使用时才编译，
+    配置了字节码缓存目录时编译结果写入磁盘，重启后无需重新编译。
+    """
     PARENT_FOLDER = Path(__file__).parent.parent.resolve()
+    # 模板名称 -> (模板目录, 文件名)
+    TEMPLATE_FILES = {
+        "gt_main": ("gametool", "template.html"),
+        "gt_weapons": ("gametool", "template_weapons.html"),
+        "gt_vehicles": ("gametool", "template_vehicles.html"),
+        "gt_servers": ("gametool", "template_servers.html"),
+        "gt_weapon_card": ("gametool", "weapon_card.html"),
+        "gt_vehicle_card": ("gametool", "vehicle_card.html"),
+        "gt_server_card": ("gametool", "server_card.html"),
+
+        "btr_main": ("btr", "template.html"),
+        "btr_weapons": ("btr", "template_weapons.html"),
+        "btr_vehicles": ("btr", "template_vehicles.html"),
+        "btr_soldiers": ("btr", "template_soldier.html"),
+        "btr_matches": ("btr", "template_matches.html"),
+        "btr_weapon_card": ("btr", "weapon_card.html"),
+        "btr_vehicle_card": ("btr", "vehicle_card.html"),
+        "btr_soldier_card": ("btr", "soldier_card.html"),
+    }
+    # 预先编译的Tailwind样式，由scripts/build_css.py生成，不存在时模板回退到CDN
+    TAILWIND_CSS_FILE = PARENT_FOLDER / "template" / "tailwind.css"
+    # 字节码缓存目录，None表示只在内存中缓存
+    bytecode_cache_dir: Optional[Path] = None
+    # 是否在模板文件修改后自动重新编译，仅调试模板时开启
+    auto_reload = False
+    _envs: Dict[str, Environment] = {}
+
+    @classmethod
+    def configure(cls, bytecode_cache_dir: Optional[Path] = None, auto_reload: bool = False):
+        """
+        设置模板环境参数，已创建的环境会被丢弃
+        Args:
+            bytecode_cache_dir: 字节码缓存目录
+            auto_reload: 模板文件修改后是否自动重新编译
+        """
+        cls.bytecode_cache_dir = bytecode_cache_dir
+        cls.auto_reload = auto_reload
+        cls._envs = {}
+
+    @classmethod
+    def get_env(cls, folder: str) -> Environment:
+        """获取模板目录对应的Jinja2环境，同一目录只创建一次"""
+        env = cls._envs.get(folder)
+        if env is None:
+            bytecode_cache = None
+            if cls.bytecode_cache_dir is not None:
+                cache_dir = Path(cls.bytecode_cache_dir) / folder
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+            env = Environment(
+                loader=FileSystemLoader(cls.PARENT_FOLDER / "template" / folder),
+                bytecode_cache=bytecode_cache,
+                auto_reload=cls.auto_reload,
+            )
+            env.globals["tailwind_css"] = cls.load_tailwind_css()
+            cls._envs[folder] = env
+        return env
+
+    @classmethod
+    def load_tailwind_css(cls) -> str:
+        """读取预先编译的Tailwind样式，文件不存在时返回空字符串"""
+        try:
+            return cls.TAILWIND_CSS_FILE.read_text(encoding="utf-8")
+        except OSError:
+            return ""
 
     @classmethod
     def get_gt_template_env(cls):
         """获取Jinja2模板环境"""
-        template_dir = cls.PARENT_FOLDER / "template/gametool"
-        return Environment(loader=FileSystemLoader(template_dir))
+        return cls.get_env("gametool")
 
     @classmethod
     def get_btr_template_env(cls):
         """获取Jinja2模板环境"""
-        template_dir = cls.PARENT_FOLDER / "template/btr"
-        return Environment(loader=FileSystemLoader(template_dir))
+        return cls.get_env("btr")
 
     @classmethod
-    def get_templates(cls):
-        """获取所有模板"""
-        gt_env = cls.get_gt_template_env()
-        btr_env = cls.get_btr_template_env()
-        return {
-            "gt_main": gt_env.get_template("template.html"),
-            "gt_weapons": gt_env.get_template("template_weapons.html"),
-            "gt_vehicles": gt_env.get_template("template_vehicles.html"),
-            "gt_servers": gt_env.get_template("template_servers.html"),
-            "gt_weapon_card": gt_env.get_template("weapon_card.html"),
-            "gt_vehicle_card": gt_env.get_template("vehicle_card.html"),
-            "gt_server_card": gt_env.get_template("server_card.html"),
-
-            "btr_main": btr_env.get_template("template.html"),
-            "btr_weapons": btr_env.get_template("template_weapons.html"),
-            "btr_vehicles": btr_env.get_template("template_vehicles.html"),
-            "btr_soldiers": btr_env.get_template("template_soldier.html"),
-            "btr_matches": btr_env.get_template("template_matches.html"),
-
-            # "btr_servers": env.get_template("template_servers.html"),
-            "btr_weapon_card": btr_env.get_template("weapon_card.html"),
-            "btr_vehicle_card": btr_env.get_template("vehicle_card.html"),
-            "btr_soldier_card": btr_env.get_template("soldier_card.html"),
-            # "btr_server_card": env.get_template("/btr/server_card.html"),
-        }
+    def get_template(cls, name: str) -> Template:
+        """
+        按名称获取模板，第一次使用时编译，之后由环境缓存
+        Args:
+            name: 模板名称，见TEMPLATE_FILES
+        Returns:
+            Jinja2模板
+        """
+        folder, file_name = cls.TEMPLATE_FILES[name]
+        return cls.get_env(folder).get_template(file_name)
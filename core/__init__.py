@@ -1,4 +1,6 @@
 # 工具模块
+import importlib
+
 __all__ = [
     'plugin_logic',
     'request_util',
@@ -9,6 +11,24 @@ __all__ = [
     'get_image_base64',
 ]
 
-from .btr import btr_template, btr_image_generator
-from .gametool import gt_template, gt_image_generator
-from .image_util import get_image_base64
+# 名称 -> (模块, 属性)，第一次访问时才导入，避免加载插件时编译模板和导入实体类
+_LAZY_ATTRS = {
+    'plugin_logic': ('.plugin_logic', None),
+    'request_util': ('.request_util', None),
+    'gt_template': ('.gametool.gt_template', None),
+    'btr_template': ('.btr.btr_template', None),
+    'gt_image_generator': ('.gametool.gt_image_generator', None),
+    'btr_image_generator': ('.btr.btr_image_generator', None),
+    'get_image_base64': ('.image_util', 'get_image_base64'),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _LAZY_ATTRS[name]
+    value = importlib.import_module(module_name, __name__)
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
@@ -1,25 +1,35 @@
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import logger
 
-from ..core.request_util import (gt_request_api, btr_request_api)
+import asyncio
+
+from ..core.request_util import (gt_request_api, btr_request_api, btr_request_budget)
 from ..core.plugin_logic import PlayerDataRequest, BattlefieldPluginLogic
 from ..core.utils import format_datetime_string
 from ..core.exceptions import (
-    NetworkError, APIError, DataParseError, TimeoutError, UserInputError,
-    GameNotSupportedForOperationError, MultipleUsersError, PrivateDataError, NoDataError
+    NetworkError, APIError, DataParseError, TimeoutError, UserInputError, CircuitOpenError, RateLimitError,
+    GameNotSupportedForOperationError, MultipleUsersError, PrivateDataError, NoDataError, InvalidParameterError
 )
 from ..core.decorators import handle_exceptions
+from ..core.render_scheduler import RenderScheduler
+from ..core.rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_LLM
 
 
 class ApiHandlers:
     def __init__(self, plugin_logic: BattlefieldPluginLogic, html_render_func, timeout_config: int, ssc_token: str,
-                 session,wake_prefix):
+                 session,wake_prefix, render_max_concurrency: int = 2, render_max_queue: int = 20):
         self.plugin_logic = plugin_logic
         self.html_render = html_render_func
         self.timeout_config = timeout_config
         self.ssc_token = ssc_token
         self._session = session
         self.wake_prefix = wake_prefix
+        self.http_store = None  # 持久化响应缓存，插件初始化时设置
+        self.render_scheduler = RenderScheduler(render_max_concurrency, render_max_queue)
+
+    def render_func_for(self, event: AstrMessageEvent):
+        """获取经过渲染调度的渲染函数，同一会话的请求在同一队列中排队"""
+        return self.render_scheduler.wrap(self.html_render, event.unified_msg_origin)
 
     async def fetch_gt_data(self, event: AstrMessageEvent, request_data: PlayerDataRequest, data_type: str,
                             prop: str = None, is_llm: bool = False):
@@ -32,17 +42,25 @@ class ApiHandlers:
             {"name": request_data.ea_name, "lang": request_data.lang, "platform": self.plugin_logic.default_platform},
             self.timeout_config,
             session=self._session,
+            store=self.http_store,
         )
 
         async for result in self.plugin_logic.process_api_response(
-                event, api_data, data_type, request_data.game, self.html_render, is_llm, request_data.item_type
+                event, api_data, data_type, request_data.game, self.render_func_for(event), is_llm,
+                request_data.item_type, request_data.page
         ):
             yield result
 
-    async def _fetch_btr_data(self, event: AstrMessageEvent, request_data: PlayerDataRequest, data_type: str):
+    async def _fetch_btr_data(self, event: AstrMessageEvent, request_data: PlayerDataRequest, data_type: str,
+                              priority: int = PRIORITY_INTERACTIVE):
         """
         根据游戏类型获取数据并处理响应 (bf6/bf2042)。
         """
+        yield await self._request_btr_data(request_data, data_type, priority)
+
+    async def _request_btr_data(self, request_data: PlayerDataRequest, data_type: str,
+                                priority: int = PRIORITY_INTERACTIVE):
+        """请求单个BTR数据"""
         btr_prop_map = {
             "stat": "/player/stat",
             "weapons": "/player/weapons",
@@ -58,28 +76,63 @@ class ApiHandlers:
         if data_type == "soldier" and request_data.game != "bf2042":
             raise GameNotSupportedForOperationError(request_data.game, "士兵查询", ["bf2042"])
 
-        api_data = await btr_request_api(
+        return await btr_request_api(
             btr_prop,
             {"player_name": request_data.ea_name, "game": request_data.game, "pider": request_data.pider},
             self.timeout_config,
             self.ssc_token,
             session=self._session,
+            store=self.http_store,
+            priority=priority,
         )
-        yield api_data
 
-    async def _fetch_btr_matches_data(self, event: AstrMessageEvent, request_data: PlayerDataRequest, update_hash: str):
+    async def _gather_btr_data(self, request_data: PlayerDataRequest, data_types: list,
+                               priority: int = PRIORITY_INTERACTIVE) -> dict:
+        """
+        并发获取多个BTR数据，单次请求的超时时间为timeout_config，
+        整体耗时上限还包括限流排队和重试的时间(见btr_request_budget)
+        任意一个请求失败时取消其余请求并抛出该异常
+        Returns:
+            dict: data_type -> 响应数据
+        """
+        tasks = {
+            data_type: asyncio.ensure_future(self._request_btr_data(request_data, data_type, priority))
+            for data_type in data_types
+        }
+        budget = btr_request_budget(self.timeout_config)
+        try:
+            done, pending = await asyncio.wait(
+                tasks.values(), timeout=budget, return_when=asyncio.FIRST_EXCEPTION
+            )
+            # 按请求顺序取第一个异常，保证错误提示稳定；限流和熔断说明其余请求同样无法完成，优先提示
+            errors = [task.exception() for task in tasks.values() if task in done and task.exception() is not None]
+            if errors:
+                raise next((e for e in errors if isinstance(e, (RateLimitError, CircuitOpenError))), errors[0])
+            if pending:
+                raise TimeoutError(f"请求超时: {budget:.0f}秒内未获取到全部数据")
+            return {data_type: task.result() for data_type, task in tasks.items()}
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+
+    async def _fetch_btr_matches_data(self, event: AstrMessageEvent, request_data: PlayerDataRequest, update_hash: str,
+                                      priority: int = PRIORITY_INTERACTIVE):
         api_data = await btr_request_api(
             "/bf6/matches",
             {"player_name": request_data.ea_name, "update_hash": update_hash},
             self.timeout_config,
             self.ssc_token,
             session=self._session,
+            store=self.http_store,
+            priority=priority,
         )
         yield api_data
 
     async def handle_btr_game(self, event: AstrMessageEvent, request_data: PlayerDataRequest, prop,
                               is_llm: bool = False):
         """处理BTR游戏（bf2042, bf6）的统计数据查询"""
+        priority = PRIORITY_LLM if is_llm else PRIORITY_INTERACTIVE
         stat_data = None
         weapon_data = []
         vehicle_data = []
@@ -87,7 +140,7 @@ class ApiHandlers:
 
         if request_data.game == "bf6":
             # 使用 async for 来正确捕获异常
-            async for data in self._fetch_btr_data(event, request_data, "bf6_stat"):
+            async for data in self._fetch_btr_data(event, request_data, "bf6_stat", priority):
                 stat_data = data
 
             # 处理多用户情况
@@ -107,35 +160,30 @@ class ApiHandlers:
                     vehicle_data.append(result)
                     continue
         else:
-            # 使用 async for 来正确捕获异常
-            async for data in self._fetch_btr_data(event, request_data, "stat"):
-                stat_data = data
-
-            if prop in ["stat", "weapons"]:
-                async for data in self._fetch_btr_data(event, request_data, "weapons"):
-                    weapon_data = data
-
-            if prop in ["stat", "vehicles"]:
-                async for data in self._fetch_btr_data(event, request_data, "vehicles"):
-                    vehicle_data = data
-
-            if prop in ["stat", "soldiers"]:
-                async for data in self._fetch_btr_data(event, request_data, "soldiers"):
-                    soldier_data = data
+            # 各项数据互不依赖，并发请求
+            data_types = ["stat"] + [data_type for data_type in ["weapons", "vehicles", "soldiers"]
+                                     if prop in ["stat", data_type]]
+            results = await self._gather_btr_data(request_data, data_types, priority)
+            stat_data = results["stat"]
+            weapon_data = results.get("weapons", weapon_data)
+            vehicle_data = results.get("vehicles", vehicle_data)
+            soldier_data = results.get("soldiers", soldier_data)
 
         async for result in self.plugin_logic.handle_btr_response(prop, request_data.game,
-                                                                  self.html_render, stat_data, weapon_data,
+                                                                  self.render_func_for(event), stat_data,
+                                                                  weapon_data,
                                                                   vehicle_data, soldier_data, is_llm,
-                                                                  request_data.item_type):
+                                                                  request_data.item_type, request_data.page):
             yield result
 
     async def handle_btr_matches(self, event: AstrMessageEvent, request_data: PlayerDataRequest, provider,
                                  is_llm: bool = False):
         """查询bf6的最近战局统计数据"""
         next_page = ""
+        priority = PRIORITY_LLM if is_llm else PRIORITY_INTERACTIVE
 
         # 使用 async for 来正确捕获异常
-        async for data in self._fetch_btr_data(event, request_data, "bf6_stat"):
+        async for data in self._fetch_btr_data(event, request_data, "bf6_stat", priority):
             # 处理多用户情况
             if isinstance(data, list):
                 raise MultipleUsersError(data,self.wake_prefix,request_data.ea_name)
@@ -145,7 +193,7 @@ class ApiHandlers:
             # request_data.ea_name = data.get("platformInfo").get("platformUserHandle")
 
             # 使用 async for 来正确捕获异常
-            async for matches_data in self._fetch_btr_matches_data(event, request_data, update_hash):
+            async for matches_data in self._fetch_btr_matches_data(event, request_data, update_hash, priority):
                 if request_data.page > 1:
                     page = request_data.page - 1
                 else:
@@ -156,6 +204,8 @@ class ApiHandlers:
                     raise NoDataError("战局数据")
 
                 stats_data = matches_data.get("matches")[page].get("segments")[0].get("stats")
+                # 附上战局数据的获取时间，不修改缓存中的原始数据
+                stats_data = {**stats_data, "__update_time": matches_data.get("__update_time")}
                 matches_timestamp = format_datetime_string(
                     matches_data.get("matches")[page].get("metadata").get("timestamp"))
                 weapon_data = matches_data.get("matches")[page].get("segments")[0].get("metadata").get("weapons")
@@ -165,7 +215,7 @@ class ApiHandlers:
                 maps_data = matches_data.get("matches")[page].get("segments")[0].get("metadata").get("levels")
 
                 async for result in self.plugin_logic.handle_btr_matches_response("bf6", request_data.ea_name,
-                                                                                  self.html_render,
+                                                                                  self.render_func_for(event),
                                                                                   stats_data,
                                                                                   weapon_data, vehicle_data,
                                                                                   soldier_data,
@@ -182,7 +232,7 @@ class ApiHandlers:
 
     async def fetch_gt_servers_data(self, request_data: PlayerDataRequest, timeout_config: int, session):
         """
-        获取GT服务器数据。
+        获取GT服务器数据。服务器状态实时变化，不使用持久化缓存。
         """
         servers_data = await gt_request_api(
             request_data.game,
@@ -1,17 +1,26 @@
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional, Tuple
 
 from ...constants.battlefield_constants import ImageUrls
+from ..render_cache import RenderCache
 
 class BtrImageGenerator:
     """图片生成工具类，负责将各种数据转换为图片"""
     
-    def __init__(self, img_quality: int = 90):
+    def __init__(self, img_quality: int = 90, render_cache: Optional[RenderCache] = None):
         """
         初始化图片生成器
         Args:
             img_quality: 图片质量，默认90
+            render_cache: 渲染结果缓存，为None时每次都重新渲染
         """
         self.img_quality = img_quality
+        self.render_cache = render_cache
+
+    async def _render(self, template_name: str, html_render_func: Callable, html: str, options: dict) -> str:
+        """渲染HTML，配置了渲染缓存时复用内容相同的渲染结果"""
+        if self.render_cache is None:
+            return await html_render_func(html, {}, True, options)
+        return await self.render_cache.render(template_name, html_render_func, html, options)
     
     async def generate_main_btr_data_pic(self, game: str, html_render_func: Callable,
                                     html_builder_func: Callable,stat_data,weapon_data,vehicle_data,soldier_data, item_type: str = None) -> str:
@@ -29,10 +38,10 @@ class BtrImageGenerator:
             返回生成的图片URL
         """
         html = await html_builder_func(stat_data,weapon_data,vehicle_data,soldier_data, game, item_type)
-        url = await html_render_func(
+        url = await self._render(
+            "btr_main",
+            html_render_func,
             html,
-            {},
-            True,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
@@ -42,7 +51,7 @@ class BtrImageGenerator:
         return url
 
     async def generate_weapons_btr_data_pic(self, game: str, html_render_func: Callable,
-                                            html_builder_func: Callable,stat_data,weapon_data,vehicle_data,soldier_data, item_type: str = None) -> str:
+                                            html_builder_func: Callable,stat_data,weapon_data,vehicle_data,soldier_data, item_type: str = None, page: int = 1) -> Tuple[str, int]:
         """将查询的武器数据转为图片
         Args:
             game: 游戏代号
@@ -53,24 +62,25 @@ class BtrImageGenerator:
             vehicle_data: 查询到的载具数据等
             soldier_data: 查询到的士兵数据等
             item_type: 武器类型过滤（可选）
+            page: 页码
         Returns:
-            返回生成的图片URL
+            (图片URL, 总页数)
         """
-        html = await html_builder_func(stat_data,weapon_data,vehicle_data,soldier_data, game, item_type)
-        url = await html_render_func(
-            html,
-            {},
-            True,
+        html_page = await html_builder_func(stat_data,weapon_data,vehicle_data,soldier_data, game, item_type, page)
+        url = await self._render(
+            "btr_weapons",
+            html_render_func,
+            html_page.html,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
-                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": 20000},
+                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": html_page.height},
             },
         )
-        return url
+        return url, html_page.total_pages
 
     async def generate_vehicles_btr_data_pic(self, game: str, html_render_func: Callable,
-                                             html_builder_func: Callable,stat_data,weapon_data,vehicle_data,soldier_data, item_type: str = None) -> str:
+                                             html_builder_func: Callable,stat_data,weapon_data,vehicle_data,soldier_data, item_type: str = None, page: int = 1) -> Tuple[str, int]:
         """将查询的载具数据转为图片
         Args:
             game: 游戏代号
@@ -81,25 +91,26 @@ class BtrImageGenerator:
             vehicle_data: 查询到的载具数据等
             soldier_data: 查询到的士兵数据等
             item_type: 载具类型过滤（可选）
+            page: 页码
         Returns:
-            返回生成的图片URL
+            (图片URL, 总页数)
         """
-        html = await html_builder_func(stat_data,weapon_data,vehicle_data,soldier_data, game, item_type)
-        url = await html_render_func(
-            html,
-            {},
-            True,
+        html_page = await html_builder_func(stat_data,weapon_data,vehicle_data,soldier_data, game, item_type, page)
+        url = await self._render(
+            "btr_vehicles",
+            html_render_func,
+            html_page.html,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
-                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": 20000},
+                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": html_page.height},
             },
         )
-        return url
+        return url, html_page.total_pages
 
 
     async def generate_soldiers_btr_data_pic(self, game: str, html_render_func: Callable,
-                                             html_builder_func: Callable,stat_data,weapon_data,vehicle_data,soldier_data) -> str:
+                                             html_builder_func: Callable,stat_data,weapon_data,vehicle_data,soldier_data, item_type: str = None, page: int = 1) -> Tuple[str, int]:
         """将查询的载具数据转为图片
         Args:
             game: 游戏代号
@@ -109,21 +120,23 @@ class BtrImageGenerator:
             weapon_data: 查询到的武器数据等
             vehicle_data: 查询到的载具数据等
             soldier_data: 查询到的士兵数据等
+            item_type: 未使用，与其他列表保持一致的参数
+            page: 页码
         Returns:
-            返回生成的图片URL
+            (图片URL, 总页数)
         """
-        html = await html_builder_func(stat_data,weapon_data,vehicle_data,soldier_data, game)
-        url = await html_render_func(
-            html,
-            {},
-            True,
+        html_page = await html_builder_func(stat_data,weapon_data,vehicle_data,soldier_data, game, page)
+        url = await self._render(
+            "btr_soldier",
+            html_render_func,
+            html_page.html,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
-                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": 10000},
+                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": html_page.height},
             },
         )
-        return url
+        return url, html_page.total_pages
 
 
     async def generate_matches_btr_data_pic(self, game: str,ea_name, html_render_func: Callable,
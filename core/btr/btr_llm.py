@@ -42,9 +42,10 @@ async def btr_main_llm_builder(stat_data: dict, weapons_data, vehicles_data, sol
         stat_entity = await PlayerStats.from_bf6_dict(stat_data)
 
         # 循环创建武器、载具、士兵对象列表
-        weapons_entities = [await Weapon.from_bf6_dict(weapon_dict) for weapon_dict in weapons_data[:2]]
-        vehicles_entities = [await Vehicle.from_bf6_dict(vehicle_dict) for vehicle_dict in vehicles_data[:2]]
-        soldiers_entities = [await Soldier.from_bf6_dict(soldier_dict) for soldier_dict in soldier_data[:1]]
+        # LLM只需要文本，不获取图标
+        weapons_entities = [Weapon.from_bf6_dict(weapon_dict) for weapon_dict in weapons_data[:2]]
+        vehicles_entities = [Vehicle.from_bf6_dict(vehicle_dict) for vehicle_dict in vehicles_data[:2]]
+        soldiers_entities = [Soldier.from_bf6_dict(soldier_dict) for soldier_dict in soldier_data[:1]]
     else:
         # 创建对象
         stat_entity = PlayerStats.from_btr_dict(stat_data)
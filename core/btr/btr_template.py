@@ -1,23 +1,30 @@
 from astrbot.api import logger
-from ...constants.battlefield_constants import (ImageUrls, BackgroundColors, GameMappings, TemplateConstants)
+from ...constants.battlefield_constants import (ImageUrls, BackgroundColors, GameMappings, LayoutHeights)
 from ...models.btr_entities import PlayerStats, Weapon, Vehicle, Soldier, Modes, Maps
-from ..image_util import get_image_base64
+from ...models.html_page import HtmlPage
+from ..utils import paginate, render_template
+from ..image_util import get_image_base64, get_default_avatar_base64, resolve_images
 
 import re
 import time
 
-# 获取模板
-templates = TemplateConstants.get_templates()
-MAIN_TEMPLATE = templates["btr_main"]
-WEAPONS_TEMPLATE = templates["btr_weapons"]
-VEHICLES_TEMPLATE = templates["btr_vehicles"]
-SOLDIERS_TEMPLATE = templates["btr_soldiers"]
-MATCHES_TEMPLATE = templates["btr_matches"]
+# 模板名称，模板在第一次渲染时才加载
+MAIN_TEMPLATE = "btr_main"
+WEAPONS_TEMPLATE = "btr_weapons"
+VEHICLES_TEMPLATE = "btr_vehicles"
+SOLDIERS_TEMPLATE = "btr_soldiers"
+MATCHES_TEMPLATE = "btr_matches"
 
 base_prompt = "你是一个战地风云游戏前线记者。根据以下游戏数据，生成一个标题和内容。标题和内容要足够炸裂并吸引眼球，用词激昂，富有冲击力。可以适当调侃“薯条”玩家，言辞犀利但不失幽默。在描述战场局势和玩家表现时，请务必详细且生动。评判标准：KD<2和KPM<1为“薯条”玩家，此标准仅适用于除大逃杀以外的模式。格式要求：标题和内容分别放在<article>和<content>标签中，示例：<article>标题内容</article><content>内容正文</content>。回复使用纯文本，且不使用md等格式。字数务必控制在500到800个字之间。为了达到字数要求，请详细阐述以下内容：标题：务必爆炸性，吸引眼球，长度适中。内容：第一段（约150-200字）：开篇即点燃战火，用极具冲击力的语言描绘当前战场的紧张局势、交火激烈程度以及玩家的生死一线。可以引用虚构的“前线报道员”或“指挥官”的简短发言，渲染氛围，奠定报道基调。第二段（约200-250字）：深入剖析基于提供的游戏数据，那些表现平平甚至拉胯的“薯条”玩家现象。结合KD和KPM标准，用尖锐且略带嘲讽的口吻，详细描述他们的“贡献”以及对团队的影响。可以生动描述他们的“奇葩”行为或数据表现，并分析这些数据背后的含义。第三段（约150-200字）：总结战局，展望未来。呼吁真正的“精英战士”挺身而出，或对未来的战况做出大胆预测。再次强调游戏数据的残酷现实，并以记者的视角对整场战役进行一个振奋人心的收尾，可以增加一些对胜利的渴望或对未来的警示。请务必注意，内容需充实饱满，避免空泛，确保每一个段落都详细展开，以达到整体中文字数要求。"
 
 
 
+def format_update_time(data) -> str:
+    """格式化数据的获取时间，缓存的数据显示的是实际获取的时间，没有记录时使用当前时间"""
+    fetched_at = data.get("__update_time") if isinstance(data, dict) else None
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(fetched_at or time.time()))
+
+
 def sort_list_of_dicts(list_of_dicts, key):
     """降序排序，支持点分隔的嵌套键，如果值为零就删除该项"""
 
@@ -55,7 +62,7 @@ async def btr_main_html_builder(stat_data: dict, weapons_data, vehicles_data, so
     """
     background_color = GameMappings.BACKGROUND_COLORS.get(game, BackgroundColors.BF2042_BACKGROUND_COLOR)
     accent_from, accent_to = GameMappings.ACCENT_COLORS.get(game, ("#f59e0b", "#ef4444"))
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    update_time = format_update_time(stat_data)
 
     weapons_data = sort_list_of_dicts(weapons_data, "stats.kills.value")
     vehicles_data = sort_list_of_dicts(vehicles_data, "stats.kills.value")
@@ -71,10 +78,16 @@ async def btr_main_html_builder(stat_data: dict, weapons_data, vehicles_data, so
             vehicles_data = [v for v in vehicles_data if item_type.lower() in Vehicle._get_category(
                 v.get("metadata", {}).get("categoryName", "")).lower()]
 
-        # 循环创建武器、载具、士兵对象列表
-        weapons_entities = [await Weapon.from_bf6_dict(weapon_dict) for weapon_dict in weapons_data[:3]]
-        vehicles_entities = [await Vehicle.from_bf6_dict(vehicle_dict) for vehicle_dict in vehicles_data[:3]]
-        soldiers_entities = [await Soldier.from_bf6_dict(soldier_dict) for soldier_dict in soldier_data[:1]]
+        weapons_data, vehicles_data, soldier_data = weapons_data[:3], vehicles_data[:3], soldier_data[:1]
+        # 先并发获取所有图标，再创建武器、载具、士兵对象列表
+        images = await resolve_images(
+            [Weapon.get_image_url(d) for d in weapons_data]
+            + [Vehicle.get_image_url(d) for d in vehicles_data]
+            + [Soldier.get_image_url(d) for d in soldier_data]
+        )
+        weapons_entities = [Weapon.from_bf6_dict(weapon_dict, images) for weapon_dict in weapons_data]
+        vehicles_entities = [Vehicle.from_bf6_dict(vehicle_dict, images) for vehicle_dict in vehicles_data]
+        soldiers_entities = [Soldier.from_bf6_dict(soldier_dict, images) for soldier_dict in soldier_data]
         banner = GameMappings.BANNERS.get(game, ImageUrls.BF6_BANNER).get(soldiers_entities[0].soldier_name)
 
     else:
@@ -92,9 +105,10 @@ async def btr_main_html_builder(stat_data: dict, weapons_data, vehicles_data, so
         weapons_entities = [Weapon.from_btr_dict(weapon_dict) for weapon_dict in weapons_data[:3]]
         vehicles_entities = [Vehicle.from_btr_dict(vehicle_dict) for vehicle_dict in vehicles_data[:3]]
         soldiers_entities = [Soldier.from_btr_dict(soldier_dict) for soldier_dict in soldier_data[:1]]
-    stat_entity.avatar = ImageUrls().DEFAULT_AVATAR
+    stat_entity.avatar = await get_default_avatar_base64(stat_entity.user_name)
 
-    html = MAIN_TEMPLATE.render(
+    html = await render_template(
+        MAIN_TEMPLATE,
         banner=banner,
         update_time=update_time,
         stat_entity=stat_entity,
@@ -110,7 +124,7 @@ async def btr_main_html_builder(stat_data: dict, weapons_data, vehicles_data, so
 
 
 async def btr_weapons_html_builder(stat_data: dict, weapons_data, vehicles_data, soldier_data, game: str,
-                                  item_type: str = None) -> str:
+                                  item_type: str = None, page: int = 1) -> HtmlPage:
     """
         构建武器html
         Args:
@@ -120,15 +134,16 @@ async def btr_weapons_html_builder(stat_data: dict, weapons_data, vehicles_data,
             soldier_data: 查询到的士兵数据字典
             game: 所查询的游戏
             item_type: 武器类型过滤（可选）
+            page: 页码
         Returns:
-            构建的Html
+            构建的页面及其预估高度
     """
     # 排序
     weapons_data = sort_list_of_dicts(weapons_data, "stats.kills.value")
     soldier_data = sort_list_of_dicts(soldier_data, "stats.kills.value")
     background_color = GameMappings.BACKGROUND_COLORS.get(game, BackgroundColors.BF2042_BACKGROUND_COLOR)
     accent_from, accent_to = GameMappings.ACCENT_COLORS.get(game, ("#f59e0b", "#ef4444"))
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    update_time = format_update_time(stat_data)
 
     # 如果指定了类型，过滤武器数据
     if item_type:
@@ -139,13 +154,19 @@ async def btr_weapons_html_builder(stat_data: dict, weapons_data, vehicles_data,
             weapons_data = [w for w in weapons_data if item_type.lower() in Weapon._get_category(
                 w.get("metadata", {}).get("category", "")).lower()]
 
+    # 只处理当前页
+    weapons_data, total_pages = paginate(weapons_data, page, LayoutHeights.LIST_PAGE_SIZE)
+
     # 创建对象
     if game == "bf6":
         stat_entity = await PlayerStats.from_bf6_dict(stat_data)
 
-        # 循环创建对象列表
-        weapons_entities = [await Weapon.from_bf6_dict(weapon_dict) for weapon_dict in weapons_data]
-        soldiers_entities = [await Soldier.from_bf6_dict(soldier_dict) for soldier_dict in soldier_data[:1]]
+        # 先并发获取所有图标，再创建对象列表
+        images = await resolve_images(
+            [Weapon.get_image_url(d) for d in weapons_data] + [Soldier.get_image_url(d) for d in soldier_data[:1]]
+        )
+        weapons_entities = [Weapon.from_bf6_dict(weapon_dict, images) for weapon_dict in weapons_data]
+        soldiers_entities = [Soldier.from_bf6_dict(soldier_dict, images) for soldier_dict in soldier_data[:1]]
         banner = GameMappings.BANNERS.get(game, ImageUrls.BF6_BANNER).get(soldiers_entities[0].soldier_name)
     else:
         banner = GameMappings.BANNERS.get(game, ImageUrls.BF2042_BANNER)
@@ -153,9 +174,10 @@ async def btr_weapons_html_builder(stat_data: dict, weapons_data, vehicles_data,
 
         # 循环创建对象列表
         weapons_entities = [Weapon.from_btr_dict(weapon_dict) for weapon_dict in weapons_data]
-    stat_entity.avatar = ImageUrls().DEFAULT_AVATAR
+    stat_entity.avatar = await get_default_avatar_base64(stat_entity.user_name)
 
-    html = WEAPONS_TEMPLATE.render(
+    html = await render_template(
+        WEAPONS_TEMPLATE,
         banner=banner,
         update_time=update_time,
         stat_entity=stat_entity,
@@ -165,11 +187,12 @@ async def btr_weapons_html_builder(stat_data: dict, weapons_data, vehicles_data,
         accent_from=accent_from,
         accent_to=accent_to,
     )
-    return html
+    return HtmlPage(html, LayoutHeights.list_page(LayoutHeights.BTR_WEAPON_CARD, len(weapons_entities)), page,
+                    total_pages)
 
 
 async def btr_vehicles_html_builder(stat_data: dict, weapons_data, vehicles_data, soldier_data, game: str,
-                                   item_type: str = None) -> str:
+                                   item_type: str = None, page: int = 1) -> HtmlPage:
     """
         构建载具html
         Args:
@@ -179,8 +202,9 @@ async def btr_vehicles_html_builder(stat_data: dict, weapons_data, vehicles_data
             soldier_data: 查询到的士兵数据字典
             game: 所查询的游戏
             item_type: 载具类型过滤（可选）
+            page: 页码
         Returns:
-            构建的Html
+            构建的页面及其预估高度
     """
     # 创建对象
 
@@ -188,7 +212,7 @@ async def btr_vehicles_html_builder(stat_data: dict, weapons_data, vehicles_data
     soldier_data = sort_list_of_dicts(soldier_data, "stats.kills.value")
     background_color = GameMappings.BACKGROUND_COLORS.get(game, BackgroundColors.BF2042_BACKGROUND_COLOR)
     accent_from, accent_to = GameMappings.ACCENT_COLORS.get(game, ("#f59e0b", "#ef4444"))
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    update_time = format_update_time(stat_data)
 
     # 如果指定了类型，过滤载具数据
     if item_type:
@@ -199,22 +223,29 @@ async def btr_vehicles_html_builder(stat_data: dict, weapons_data, vehicles_data
             vehicles_data = [v for v in vehicles_data if item_type.lower() in Vehicle._get_category(
                 v.get("metadata", {}).get("category", "")).lower()]
 
+    # 只处理当前页
+    vehicles_data, total_pages = paginate(vehicles_data, page, LayoutHeights.LIST_PAGE_SIZE)
+
     # 创建对象
     if game == "bf6":
         stat_entity = await PlayerStats.from_bf6_dict(stat_data)
 
-        # 循环创建对象列表
-        vehicles_entities = [await Vehicle.from_bf6_dict(vehicle_dict) for vehicle_dict in vehicles_data]
-        soldiers_entities = [await Soldier.from_bf6_dict(soldier_dict) for soldier_dict in soldier_data[:1]]
+        # 先并发获取所有图标，再创建对象列表
+        images = await resolve_images(
+            [Vehicle.get_image_url(d) for d in vehicles_data] + [Soldier.get_image_url(d) for d in soldier_data[:1]]
+        )
+        vehicles_entities = [Vehicle.from_bf6_dict(vehicle_dict, images) for vehicle_dict in vehicles_data]
+        soldiers_entities = [Soldier.from_bf6_dict(soldier_dict, images) for soldier_dict in soldier_data[:1]]
         banner = GameMappings.BANNERS.get(game, ImageUrls.BF6_BANNER).get(soldiers_entities[0].soldier_name)
     else:
         stat_entity = PlayerStats.from_btr_dict(stat_data)
         banner = GameMappings.BANNERS.get(game, ImageUrls.BF2042_BANNER)
         # 循环创建对象列表
         vehicles_entities = [Vehicle.from_btr_dict(vehicle_dict) for vehicle_dict in vehicles_data]
-    stat_entity.avatar = ImageUrls().DEFAULT_AVATAR
+    stat_entity.avatar = await get_default_avatar_base64(stat_entity.user_name)
 
-    html = VEHICLES_TEMPLATE.render(
+    html = await render_template(
+        VEHICLES_TEMPLATE,
         banner=banner,
         update_time=update_time,
         stat_entity=stat_entity,
@@ -224,10 +255,12 @@ async def btr_vehicles_html_builder(stat_data: dict, weapons_data, vehicles_data
         accent_from=accent_from,
         accent_to=accent_to,
     )
-    return html
+    return HtmlPage(html, LayoutHeights.list_page(LayoutHeights.BTR_VEHICLE_CARD, len(vehicles_entities)), page,
+                    total_pages)
 
 
-async def btr_soldier_html_builder(stat_data: dict, weapons_data, vehicles_data, soldier_data, game: str) -> str:
+async def btr_soldier_html_builder(stat_data: dict, weapons_data, vehicles_data, soldier_data, game: str,
+                                   page: int = 1) -> HtmlPage:
     """
         构建士兵html
         Args:
@@ -236,28 +269,35 @@ async def btr_soldier_html_builder(stat_data: dict, weapons_data, vehicles_data,
             vehicles_data: 查询到的载具数据字典
             soldier_data: 查询到的士兵数据字典
             game: 所查询的游戏
+            page: 页码
         Returns:
-            构建的Html
+            构建的页面
     """
     soldier_data = sort_list_of_dicts(soldier_data, "stats.kills.value")
+    # Banner始终使用击杀最多的士兵，列表只处理当前页
+    top_soldier_data = soldier_data[:1]
+    soldier_data, total_pages = paginate(soldier_data, page, LayoutHeights.LIST_PAGE_SIZE)
     background_color = GameMappings.BACKGROUND_COLORS.get(game, BackgroundColors.BF2042_BACKGROUND_COLOR)
     accent_from, accent_to = GameMappings.ACCENT_COLORS.get(game, ("#f59e0b", "#ef4444"))
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    update_time = format_update_time(stat_data)
     if game == "bf6":
         stat_entity = await PlayerStats.from_bf6_dict(stat_data)
 
-        # 循环创建对象列表
-        soldiers_entities = [await Soldier.from_bf6_dict(soldier_dict) for soldier_dict in soldier_data]
-        banner = GameMappings.BANNERS.get(game, ImageUrls.BF6_BANNER).get(soldiers_entities[0].soldier_name)
+        # 先并发获取所有图标，再创建对象列表
+        images = await resolve_images([Soldier.get_image_url(d) for d in soldier_data + top_soldier_data])
+        soldiers_entities = [Soldier.from_bf6_dict(soldier_dict, images) for soldier_dict in soldier_data]
+        top_soldier = Soldier.from_bf6_dict(top_soldier_data[0], images)
+        banner = GameMappings.BANNERS.get(game, ImageUrls.BF6_BANNER).get(top_soldier.soldier_name)
     else:
         banner = GameMappings.BANNERS.get(game, ImageUrls.BF2042_BANNER)
         stat_entity = PlayerStats.from_btr_dict(stat_data)
         # 循环创建士兵对象列表
         soldiers_entities = [Soldier.from_btr_dict(soldier_dict) for soldier_dict in soldier_data]
 
-    stat_entity.avatar = ImageUrls().DEFAULT_AVATAR
+    stat_entity.avatar = await get_default_avatar_base64(stat_entity.user_name)
 
-    html = SOLDIERS_TEMPLATE.render(
+    html = await render_template(
+        SOLDIERS_TEMPLATE,
         banner=banner,
         update_time=update_time,
         stat_entity=stat_entity,
@@ -267,7 +307,8 @@ async def btr_soldier_html_builder(stat_data: dict, weapons_data, vehicles_data,
         accent_from=accent_from,
         accent_to=accent_to,
     )
-    return html
+    return HtmlPage(html, LayoutHeights.list_page(LayoutHeights.BTR_SOLDIER_CARD, len(soldiers_entities)), page,
+                    total_pages)
 
 
 async def btr_matches_html_builder(ea_name: str, stat_data: dict, weapons_data, vehicles_data, soldier_data, mode_data,
@@ -288,7 +329,7 @@ async def btr_matches_html_builder(ea_name: str, stat_data: dict, weapons_data,
         Returns:
             构建的Html
     """
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    update_time = format_update_time(stat_data)
     bf6_background = await get_image_base64(ImageUrls.BF6_BACKGROUND)
 
     weapons_data = sort_list_of_dicts(weapons_data, "stats.kills")
@@ -299,12 +340,19 @@ async def btr_matches_html_builder(ea_name: str, stat_data: dict, weapons_data,
 
     stat_entity = await PlayerStats.from_bf6_matches_dict(stat_data, ea_name)
 
-    # 循环创建武器、载具、士兵对象列表
-    weapons_entities = [await Weapon.from_bf6_matches_dict(weapon_dict) for weapon_dict in weapons_data]
-    vehicles_entities = [await Vehicle.from_bf6_matches_dict(vehicle_dict) for vehicle_dict in vehicles_data]
-    soldiers_entities = [await Soldier.from_bf6_matches_dict(soldier_dict) for soldier_dict in soldier_data]
-    modes_entities = [await Modes.from_bf6_matches_dict(mode_dict) for mode_dict in mode_data]
-    maps_entities = [await Maps.from_bf6_matches_dict(maps_dict) for maps_dict in maps_data]
+    # 先并发获取所有图标，再创建武器、载具、士兵、模式、地图对象列表
+    images = await resolve_images(
+        [Weapon.get_image_url(d) for d in weapons_data]
+        + [Vehicle.get_image_url(d) for d in vehicles_data]
+        + [Soldier.get_image_url(d) for d in soldier_data]
+        + [Modes.get_image_url(d) for d in mode_data]
+        + [Maps.get_image_url(d) for d in maps_data]
+    )
+    weapons_entities = [Weapon.from_bf6_matches_dict(weapon_dict, images) for weapon_dict in weapons_data]
+    vehicles_entities = [Vehicle.from_bf6_matches_dict(vehicle_dict, images) for vehicle_dict in vehicles_data]
+    soldiers_entities = [Soldier.from_bf6_matches_dict(soldier_dict, images) for soldier_dict in soldier_data]
+    modes_entities = [Modes.from_bf6_matches_dict(mode_dict, images) for mode_dict in mode_data]
+    maps_entities = [Maps.from_bf6_matches_dict(maps_dict, images) for maps_dict in maps_data]
 
     # 计算最近地图胜场
     map_total = " // ".join(
@@ -336,7 +384,8 @@ async def btr_matches_html_builder(ea_name: str, stat_data: dict, weapons_data,
         resp_arr[0] = title_match.group(1).strip() if title_match else ""
         resp_arr[1] = content_match.group(1).strip() if content_match else ""
 
-    html = MATCHES_TEMPLATE.render(
+    html = await render_template(
+        MATCHES_TEMPLATE,
         bf6_background=bf6_background,
         update_time=update_time,
         stat_entity=stat_entity,
@@ -0,0 +1,110 @@
+"""
+进程内缓存工具
+提供带TTL、按条目数和字节数双重上限的LRU缓存，并统计命中/未命中次数
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """带过期时间的LRU缓存
+
+    所有操作都在事件循环线程中同步完成，不涉及IO，因此无需加锁。
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024, default_ttl: Optional[float] = 300):
+        """
+        Args:
+            max_entries: 最大条目数
+            max_bytes: 最大占用字节数(按调用方给出的大小累计)
+            default_ttl: 默认过期时间(秒)，None表示永不过期
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (value, size, expires_at)
+        self._data: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取缓存值，过期或不存在时返回None"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, size, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, size: int = 0, ttl: Optional[float] = -1):
+        """
+        写入缓存
+        Args:
+            key: 缓存键
+            value: 缓存值
+            size: 该条目占用的字节数
+            ttl: 过期时间(秒)，-1表示使用默认值，None表示永不过期
+        """
+        if size > self.max_bytes:
+            # 单条超过上限的数据不缓存
+            return
+        if ttl == -1:
+            ttl = self.default_ttl
+        if key in self._data:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, size, expires_at)
+        self._bytes += size
+        self._evict()
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """移除并返回缓存值"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        self._remove(key)
+        return entry[0]
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        """按LRU顺序淘汰，直到满足条目数和字节数上限"""
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            key, (_, size, _) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
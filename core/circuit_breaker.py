@@ -0,0 +1,188 @@
+"""
+接口熔断
+同一接口连续失败达到阈值后熔断，熔断期间直接拒绝请求而不是等到超时；
+熔断一段时间后放行一个探测请求，成功则恢复。
+同时记录最近请求的耗时，用于对冲请求：请求超过p95耗时仍未返回时再发起一次，取先返回的结果。
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from astrbot.api import logger
+
+from .exceptions import (BattlefieldPluginError, CircuitOpenError, NetworkError, ServerResponseError,
+                         TimeoutError)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """判断异常是否说明接口本身不可用，用户输入类错误(如玩家不存在)说明接口正常"""
+    if isinstance(error, (NetworkError, TimeoutError, ServerResponseError)):
+        return True
+    return not isinstance(error, (BattlefieldPluginError, asyncio.CancelledError))
+
+
+async def hedged(coro_factory: Callable[[], Awaitable[Any]], delay: float) -> Any:
+    """
+    对冲请求：第一次请求超过delay秒未返回时再发起一次，返回先成功的结果
+    Args:
+        coro_factory: 创建请求协程的函数，必须是幂等请求
+        delay: 发起第二次请求前等待的时间(秒)
+    Returns:
+        先成功的请求结果，全部失败时抛出第一个请求的异常
+    """
+    tasks = [asyncio.ensure_future(coro_factory())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            logger.debug(f"Battlefield Tool 请求超过{delay:.2f}秒未返回，发起对冲请求")
+            tasks.append(asyncio.ensure_future(coro_factory()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        # 全部失败，抛出第一个请求的异常
+        raise tasks[0].exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # 取走异常，避免未读取的告警
+
+
+class CircuitBreaker:
+    """单个接口的熔断器
+
+    所有状态只在事件循环线程中修改。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30, window: int = 50,
+                 min_samples: int = 20):
+        """
+        Args:
+            name: 接口名称，用于日志
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断多久(秒)后放行探测请求
+            window: 统计耗时的最近请求数
+            min_samples: 至少有多少个样本才计算耗时分位数
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.min_samples = min_samples
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._latencies = deque(maxlen=window)
+        # 统计信息
+        self.total = 0
+        self.rejected = 0
+
+    def percentile(self, p: float) -> Optional[float]:
+        """最近成功请求耗时的p分位数(秒)，样本不足时返回None"""
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def stats(self) -> dict:
+        """获取熔断器统计信息"""
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "total": self.total,
+            "rejected": self.rejected,
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+        }
+
+    def check(self):
+        """
+        检查当前是否会放行请求，不占用探测名额
+        Raises:
+            CircuitOpenError: 接口处于熔断中
+        """
+        if self.state == STATE_OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.reset_timeout - (time.monotonic() - self._opened_at))
+        if self.state == STATE_HALF_OPEN and self._probing:
+            self.rejected += 1
+            raise CircuitOpenError(self.name)
+
+    def _before_call(self):
+        self.check()
+        if self.state == STATE_OPEN:
+            self.state = STATE_HALF_OPEN
+            logger.info(f"Battlefield Tool 接口{self.name}熔断结束，发起探测请求")
+        if self.state == STATE_HALF_OPEN:
+            self._probing = True
+
+    def _on_success(self, latency: float):
+        self._latencies.append(latency)
+        self._on_healthy()
+
+    def _on_healthy(self):
+        """接口正常响应(包括玩家不存在等用户错误)，不记录耗时，避免很快返回的错误拉低对冲等待时间"""
+        self._failures = 0
+        if self.state != STATE_CLOSED:
+            logger.info(f"Battlefield Tool 接口{self.name}已恢复")
+        self.state = STATE_CLOSED
+        self._probing = False
+
+    def _on_failure(self):
+        self._failures += 1
+        self._probing = False
+        if self.state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                logger.warning(f"Battlefield Tool 接口{self.name}连续失败{self._failures}次，"
+                               f"熔断{self.reset_timeout}秒")
+            self.state = STATE_OPEN
+            self._opened_at = time.monotonic()
+
+    async def call(self, coro_factory: Callable[[], Awaitable[Any]], hedge: bool = False,
+                   max_hedge_delay: Optional[float] = None) -> Any:
+        """
+        经过熔断器发起请求
+        Args:
+            coro_factory: 创建请求协程的函数
+            hedge: 是否启用对冲请求，仅用于幂等请求
+            max_hedge_delay: 对冲等待时间的上限(秒)
+        Returns:
+            请求结果
+        Raises:
+            CircuitOpenError: 接口处于熔断中
+        """
+        self.total += 1
+        self._before_call()
+        start = time.monotonic()
+        try:
+            delay = self.percentile(95) if hedge else None
+            if delay is not None:
+                if max_hedge_delay is not None:
+                    delay = min(delay, max_hedge_delay)
+                result = await hedged(coro_factory, max(delay, 0.2))
+            else:
+                result = await coro_factory()
+        except asyncio.CancelledError:
+            self._probing = False
+            raise
+        except Exception as e:
+            if is_endpoint_failure(e):
+                self._on_failure()
+            else:
+                self._on_healthy()
+            raise
+        self._on_success(time.monotonic() - start)
+        return result
@@ -19,6 +19,7 @@ class ErrorHandler:
             "input_error": "输入格式错误，请检查命令格式",
             "database_error": "数据库操作失败，请稍后重试",
             "image_error": "图片生成失败，请稍后重试",
+            "render_busy": "当前查询人数较多，请稍后重试",
             "auth_error": "认证失败，请检查配置",
             "permission_error": "权限不足，无法执行此操作",
             "timeout_error": "请求超时，请稍后重试",
@@ -28,6 +29,7 @@ class ErrorHandler:
             "game_not_supported": "不支持的游戏 '{game}'，支持的游戏: {supported_games}",
             "network_timeout": "网络请求超时，请检查网络连接后重试",
             "api_limit": "API调用频率过高，请稍后重试",
+            "circuit_open": "数据接口暂时不可用，请稍后重试",
             "private_profile": "该玩家数据设置为私有，无法查看",
             "server_not_found": "未找到服务器 '{server_name}'",
             "bind_required": "请先使用 bind [用户名] 绑定账户",
@@ -55,8 +57,8 @@ class ErrorHandler:
         if error.user_message and error.user_message != error.message:
             return error.user_message
         
-        # 根据异常类型返回默认消息
-        error_type = type(error).__name__.lower().replace("error", "")
+        # 根据异常声明的消息键或异常类型返回默认消息
+        error_type = error.message_key or type(error).__name__.lower().replace("error", "")
         return self.error_messages.get(error_type, self.error_messages["unknown_error"])
     
     def handle_unknown_error(self, error: Exception) -> str:
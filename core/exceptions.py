@@ -6,6 +6,9 @@ Battlefield 插件自定义异常类
 
 class BattlefieldPluginError(Exception):
     """插件基础异常类"""
+
+    # 没有指定user_message时，ErrorHandler按这个键查找用户友好信息
+    message_key: str = None
     
     def __init__(self, message: str, user_message: str = None, error_code: str = None):
         """
@@ -27,6 +30,16 @@ class NetworkError(BattlefieldPluginError):
         super().__init__(message, user_message, error_code)
 
 
+class CircuitOpenError(NetworkError):
+    """接口熔断中异常"""
+
+    message_key = "circuit_open"
+
+    def __init__(self, endpoint: str, retry_after: float = None):
+        super().__init__(f"接口熔断中: {endpoint}", None, "CIRCUIT_OPEN")
+        self.retry_after = retry_after  # 距离熔断结束的时间(秒)
+
+
 class APIError(BattlefieldPluginError):
     """API调用异常"""
     
@@ -34,6 +47,26 @@ class APIError(BattlefieldPluginError):
         super().__init__(message, user_message, error_code)
 
 
+class ServerResponseError(APIError):
+    """接口返回429或5xx等服务端错误"""
+
+    def __init__(self, status: int, message: str = None, retry_after: float = None):
+        super().__init__(message or f"接口返回错误状态码: {status}", error_code="SERVER_ERROR")
+        self.status = status
+        self.retry_after = retry_after  # Retry-After响应头给出的等待时间(秒)
+
+
+class RateLimitError(APIError):
+    """请求频率超出限制异常"""
+
+    message_key = "api_limit"
+
+    def __init__(self, message: str, user_message: str = None, error_code: str = "API_LIMIT",
+                 retry_after: float = None):
+        super().__init__(message, user_message, error_code)
+        self.retry_after = retry_after  # 建议的重试等待时间(秒)
+
+
 class DataParseError(BattlefieldPluginError):
     """数据解析异常"""
     
@@ -62,6 +95,15 @@ class ImageGenerationError(BattlefieldPluginError):
         super().__init__(message, user_message, error_code)
 
 
+class RenderBusyError(ImageGenerationError):
+    """渲染繁忙异常"""
+
+    message_key = "render_busy"
+
+    def __init__(self, message: str, user_message: str = None, error_code: str = "RENDER_BUSY"):
+        super().__init__(message, user_message, error_code)
+
+
 class AuthenticationError(BattlefieldPluginError):
     """认证相关异常"""
     
@@ -1,19 +1,28 @@
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional, Tuple
 
 # 定义图片裁剪的通用参数
 from ...constants.battlefield_constants import ImageUrls
+from ..render_cache import RenderCache
 
 
 class GtImageGenerator:
     """图片生成工具类，负责将各种数据转换为图片"""
     
-    def __init__(self, img_quality: int = 90):
+    def __init__(self, img_quality: int = 90, render_cache: Optional[RenderCache] = None):
         """
         初始化图片生成器
         Args:
             img_quality: 图片质量，默认90
+            render_cache: 渲染结果缓存，为None时每次都重新渲染
         """
         self.img_quality = img_quality
+        self.render_cache = render_cache
+
+    async def _render(self, template_name: str, html_render_func: Callable, html: str, options: dict) -> str:
+        """渲染HTML，配置了渲染缓存时复用内容相同的渲染结果"""
+        if self.render_cache is None:
+            return await html_render_func(html, {}, True, options)
+        return await self.render_cache.render(template_name, html_render_func, html, options)
     
     async def generate_main_gt_data_pic(self, data: Dict[str, Any], game: str, html_render_func: Callable,
                                     html_builder_func: Callable, item_type: str = None) -> str:
@@ -28,10 +37,10 @@ class GtImageGenerator:
             返回生成的图片URL
         """
         html = await html_builder_func(data, game, item_type)
-        url = await html_render_func(
+        url = await self._render(
+            "gt_main",
+            html_render_func,
             html,
-            {},
-            True,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
@@ -41,7 +50,7 @@ class GtImageGenerator:
         return url
 
     async def generate_weapons_gt_data_pic(self, data: Dict[str, Any], game: str, html_render_func: Callable,
-                                       html_builder_func: Callable, item_type: str = None) -> str:
+                                       html_builder_func: Callable, item_type: str = None, page: int = 1) -> Tuple[str, int]:
         """将查询的武器数据转为图片
         Args:
             data: 查询到的武器数据等
@@ -49,24 +58,25 @@ class GtImageGenerator:
             html_render_func: HTML渲染函数
             html_builder_func: HTML构建函数
             item_type: 武器类型过滤（可选）
+            page: 页码
         Returns:
-            返回生成的图片URL
+            (图片URL, 总页数)
         """
-        html = await html_builder_func(data, game, item_type)
-        url = await html_render_func(
-            html,
-            {},
-            True,
+        html_page = await html_builder_func(data, game, item_type, page)
+        url = await self._render(
+            "gt_weapons",
+            html_render_func,
+            html_page.html,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
-                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": 10000},
+                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": html_page.height},
             },
         )
-        return url
+        return url, html_page.total_pages
 
     async def generate_vehicles_gt_data_pic(self, data: Dict[str, Any], game: str, html_render_func: Callable,
-                                        html_builder_func: Callable, item_type: str = None) -> str:
+                                        html_builder_func: Callable, item_type: str = None, page: int = 1) -> Tuple[str, int]:
         """将查询的载具数据转为图片
         Args:
             data: 查询到的载具数据等
@@ -74,21 +84,22 @@ class GtImageGenerator:
             html_render_func: HTML渲染函数
             html_builder_func: HTML构建函数
             item_type: 载具类型过滤（可选）
+            page: 页码
         Returns:
-            返回生成的图片URL
+            (图片URL, 总页数)
         """
-        html = await html_builder_func(data, game, item_type)
-        url = await html_render_func(
-            html,
-            {},
-            True,
+        html_page = await html_builder_func(data, game, item_type, page)
+        url = await self._render(
+            "gt_vehicles",
+            html_render_func,
+            html_page.html,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
-                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": 10000},
+                "clip": {**ImageUrls.COMMON_CLIP_PARAMS, "height": html_page.height},
             },
         )
-        return url
+        return url, html_page.total_pages
     
     async def generate_servers_gt_data_pic(self, data: Dict[str, Any], game: str, html_render_func: Callable,
                                        html_builder_func: Callable) -> str:
@@ -109,10 +120,10 @@ class GtImageGenerator:
             height = 670
             
         html = await html_builder_func(data, game)
-        url = await html_render_func(
+        url = await self._render(
+            "gt_servers",
+            html_render_func,
             html,
-            {},
-            True,
             {
                 "timeout": 10000,
                 "quality": self.img_quality,
@@ -1,21 +1,22 @@
 from astrbot.api import logger
-from ...constants.battlefield_constants import (ImageUrls, BackgroundColors, GameMappings, TemplateConstants)
+from ...constants.battlefield_constants import (ImageUrls, BackgroundColors, GameMappings, LayoutHeights)
 from ...models.gt_entities import PlayerStats, Weapon, Vehicle, Server # 导入实体类
-from ..image_util import get_image_base64
+from ...models.html_page import HtmlPage
+from ..utils import paginate, render_template
+from ..image_util import resolve_images
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 
 import time
 
-# 获取模板
-templates = TemplateConstants.get_templates()
-MAIN_TEMPLATE = templates["gt_main"]
-WEAPONS_TEMPLATE = templates["gt_weapons"]
-VEHICLES_TEMPLATE = templates["gt_vehicles"]
-SERVERS_TEMPLATE = templates["gt_servers"]
-WEAPON_CARD = templates["gt_weapon_card"]
-VEHICLE_CARD = templates["gt_vehicle_card"]
-SERVER_CARD = templates["gt_server_card"]
+# 模板名称，模板在第一次渲染时才加载
+MAIN_TEMPLATE = "gt_main"
+WEAPONS_TEMPLATE = "gt_weapons"
+VEHICLES_TEMPLATE = "gt_vehicles"
+SERVERS_TEMPLATE = "gt_servers"
+WEAPON_CARD = "gt_weapon_card"
+VEHICLE_CARD = "gt_vehicle_card"
+SERVER_CARD = "gt_server_card"
 
 
 def sort_list_of_dicts(list_of_dicts, key):
@@ -23,11 +24,11 @@ def sort_list_of_dicts(list_of_dicts, key):
     return sorted(list_of_dicts, key=lambda k: k[key], reverse=True)
 
 
-def prepare_weapons_data(d: dict, lens: int, game: str, item_type: str = None) -> List[Weapon]:
+def prepare_weapons_data(d: dict, lens: Optional[int], game: str, item_type: str = None) -> List[Weapon]:
     """提取武器数据，格式化使用时间，并返回 Weapon 对象列表
     Args:
         d: 原始数据字典
-        lens: 返回数量限制
+        lens: 返回数量限制，None表示不限制
         game: 游戏代号
         item_type: 武器类型过滤（可选）
     """
@@ -44,16 +45,16 @@ def prepare_weapons_data(d: dict, lens: int, game: str, item_type: str = None) -
             weapon = Weapon.from_dict(w_data)
             weapons_objects.append(weapon)
             # 达到数量限制后停止
-            if len(weapons_objects) >= lens:
+            if lens is not None and len(weapons_objects) >= lens:
                 break
 
     return weapons_objects
 
-def prepare_vehicles_data(d: dict, lens: int, item_type: str = None) -> List[Vehicle]:
+def prepare_vehicles_data(d: dict, lens: Optional[int], item_type: str = None) -> List[Vehicle]:
     """提取载具数据，格式化使用时间，并返回 Vehicle 对象列表
     Args:
         d: 原始数据字典
-        lens: 返回数量限制
+        lens: 返回数量限制，None表示不限制
         item_type: 载具类型过滤（可选）
     """
     vehicles_list_raw = d.get("vehicles", [])
@@ -71,7 +72,7 @@ def prepare_vehicles_data(d: dict, lens: int, item_type: str = None) -> List[Veh
             vehicle = Vehicle.from_dict(v_data)
             vehicles_objects.append(vehicle)
             # 达到数量限制后停止
-            if len(vehicles_objects) >= lens:
+            if lens is not None and len(vehicles_objects) >= lens:
                 break
 
     return vehicles_objects
@@ -85,6 +86,36 @@ def img_repair_vehicles(item_name:str,url:str):
 
 
 
+def _is_remote_url(url: Any) -> bool:
+    return isinstance(url, str) and url.startswith(("http://", "https://"))
+
+
+async def inline_images(player_stats: Optional[PlayerStats] = None, items: Iterable[Any] = (),
+                        **urls: str) -> Dict[str, str]:
+    """
+    渲染前并发获取页面用到的所有图片并替换为Base64编码，渲染时不再访问网络
+    Args:
+        player_stats: 玩家数据，头像和等级图标会被替换
+        items: 带image属性的武器/载具/服务器对象，图片会被替换
+        **urls: 其他需要替换的图片，如banner、logo
+    Returns:
+        urls中每个图片替换后的值，获取失败时保留原URL
+    """
+    items = list(items)
+    wanted = list(urls.values()) + [item.image for item in items]
+    if player_stats is not None:
+        wanted += [player_stats.avatar, player_stats.rank_img]
+    images = await resolve_images(url for url in wanted if _is_remote_url(url))
+
+    for item in items:
+        item.image = images.get(item.image, item.image)
+    if player_stats is not None:
+        player_stats.avatar = images.get(player_stats.avatar, player_stats.avatar)
+        player_stats.rank_img = images.get(player_stats.rank_img, player_stats.rank_img)
+    return {name: images.get(url, url) for name, url in urls.items()}
+
+
+
 async def gt_main_html_builder(raw_data: dict, game: str, item_type: str = None) -> str:
     """
     构建主要html
@@ -101,10 +132,8 @@ async def gt_main_html_builder(raw_data: dict, game: str, item_type: str = None)
 
     # 预处理原始数据，使其符合 PlayerStats.from_gt_dict 的期望
     processed_data = raw_data.copy()
-    if processed_data.get("avatar"):
-        processed_data["avatar"] = await get_image_base64(processed_data["avatar"])
-    else:
-        processed_data["avatar"] = ImageUrls().DEFAULT_AVATAR
+    if not processed_data.get("avatar"):
+        processed_data["avatar"] = ImageUrls.get_default_avatar(processed_data.get("userName") or processed_data.get("id", ""))
 
     processed_data["__hours_played"] = str(round(processed_data.get("secondsPlayed", 0) / 3600, 1))
     processed_data["revives"] = int(processed_data.get("revives", 0))
@@ -118,8 +147,10 @@ async def gt_main_html_builder(raw_data: dict, game: str, item_type: str = None)
     # 整理武器和载具数据，返回实体对象列表
     weapons_objects = prepare_weapons_data(processed_data, 3, game, item_type)
     vehicles_objects = prepare_vehicles_data(processed_data, 3, item_type)
+    banner = (await inline_images(player_stats, weapons_objects + vehicles_objects, banner=banner))["banner"]
 
-    html = MAIN_TEMPLATE.render(
+    html = await render_template(
+        MAIN_TEMPLATE,
         banner=banner,
         update_time=update_time,
         d=player_stats,
@@ -133,15 +164,16 @@ async def gt_main_html_builder(raw_data: dict, game: str, item_type: str = None)
     return html
 
 
-async def gt_weapons_html_builder(raw_data: dict, game: str, item_type: str = None) -> str:
+async def gt_weapons_html_builder(raw_data: dict, game: str, item_type: str = None, page: int = 1) -> HtmlPage:
     """
     构建武器html
     Args:
         raw_data: 查询到的原始数据字典
         game: 所查询的游戏
         item_type: 武器类型过滤（可选）
+        page: 页码
     Returns:
-        构建的Html
+        构建的页面及其预估高度
     """
     banner = GameMappings.BANNERS.get(game, ImageUrls.BFV_BANNER)
     background_color = GameMappings.BACKGROUND_COLORS.get(game, BackgroundColors.BF3_BACKGROUND_COLOR)
@@ -149,10 +181,8 @@ async def gt_weapons_html_builder(raw_data: dict, game: str, item_type: str = No
 
     # 预处理原始数据，使其符合 PlayerStats.from_gt_dict 的期望
     processed_data = raw_data.copy()
-    if processed_data.get("avatar"):
-        processed_data["avatar"] = await get_image_base64(processed_data["avatar"])
-    else:
-        processed_data["avatar"] = ImageUrls().DEFAULT_AVATAR
+    if not processed_data.get("avatar"):
+        processed_data["avatar"] = ImageUrls.get_default_avatar(processed_data.get("userName") or processed_data.get("id", ""))
 
     # 计算 hours_played 并添加到 processed_data，以便 PlayerStats.from_gt_dict 使用
     processed_data["__hours_played"] = str(round(processed_data.get("secondsPlayed", 0) / 3600, 1))
@@ -164,10 +194,13 @@ async def gt_weapons_html_builder(raw_data: dict, game: str, item_type: str = No
 
     update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(processed_data["__update_time"]))
 
-    # 整理武器数据，返回实体对象列表
-    weapons_objects = prepare_weapons_data(processed_data, 50, game, item_type)
+    # 整理武器数据，返回当前页的实体对象列表
+    weapons_objects, total_pages = paginate(prepare_weapons_data(processed_data, None, game, item_type), page,
+                                            LayoutHeights.LIST_PAGE_SIZE)
+    banner = (await inline_images(player_stats, weapons_objects, banner=banner))["banner"]
 
-    html = WEAPONS_TEMPLATE.render(
+    html = await render_template(
+        WEAPONS_TEMPLATE,
         banner=banner,
         update_time=update_time,
         d=player_stats,
@@ -177,18 +210,20 @@ async def gt_weapons_html_builder(raw_data: dict, game: str, item_type: str = No
         accent_from=accent_from,
         accent_to=accent_to,
     )
-    return html
+    card_height = LayoutHeights.GT_WEAPON_CARD_BF4 if game == "bf4" else LayoutHeights.GT_WEAPON_CARD
+    return HtmlPage(html, LayoutHeights.list_page(card_height, len(weapons_objects)), page, total_pages)
 
 
-async def gt_vehicles_html_builder(raw_data: dict, game: str, item_type: str = None) -> str:
+async def gt_vehicles_html_builder(raw_data: dict, game: str, item_type: str = None, page: int = 1) -> HtmlPage:
     """
     构建载具html
     Args:
         raw_data: 查询到的原始数据字典
         game: 所查询的游戏
         item_type: 载具类型过滤（可选）
+        page: 页码
     Returns:
-        构建的Html
+        构建的页面及其预估高度
     """
     banner = GameMappings.BANNERS.get(game, ImageUrls.BFV_BANNER)
     background_color = GameMappings.BACKGROUND_COLORS.get(game, BackgroundColors.BF3_BACKGROUND_COLOR)
@@ -196,10 +231,8 @@ async def gt_vehicles_html_builder(raw_data: dict, game: str, item_type: str = N
 
     # 预处理原始数据，使其符合 PlayerStats.from_gt_dict 的期望
     processed_data = raw_data.copy()
-    if processed_data.get("avatar"):
-        processed_data["avatar"] = await get_image_base64(processed_data["avatar"])
-    else:
-        processed_data["avatar"] = ImageUrls().DEFAULT_AVATAR
+    if not processed_data.get("avatar"):
+        processed_data["avatar"] = ImageUrls.get_default_avatar(processed_data.get("userName") or processed_data.get("id", ""))
 
     # 计算 hours_played 并添加到 processed_data，以便 PlayerStats.from_gt_dict 使用
     processed_data["__hours_played"] = str(round(processed_data.get("secondsPlayed", 0) / 3600, 1))
@@ -211,10 +244,13 @@ async def gt_vehicles_html_builder(raw_data: dict, game: str, item_type: str = N
 
     update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(processed_data["__update_time"]))
 
-    # 整理载具数据，返回实体对象列表
-    vehicles_objects = prepare_vehicles_data(processed_data, 50, item_type)
+    # 整理载具数据，返回当前页的实体对象列表
+    vehicles_objects, total_pages = paginate(prepare_vehicles_data(processed_data, None, item_type), page,
+                                             LayoutHeights.LIST_PAGE_SIZE)
+    banner = (await inline_images(player_stats, vehicles_objects, banner=banner))["banner"]
 
-    html = VEHICLES_TEMPLATE.render(
+    html = await render_template(
+        VEHICLES_TEMPLATE,
         banner=banner,
         update_time=update_time,
         d=player_stats,
@@ -224,7 +260,8 @@ async def gt_vehicles_html_builder(raw_data: dict, game: str, item_type: str = N
         accent_from=accent_from,
         accent_to=accent_to,
     )
-    return html
+    return HtmlPage(html, LayoutHeights.list_page(LayoutHeights.GT_VEHICLE_CARD, len(vehicles_objects)), page,
+                    total_pages)
 
 
 async def gt_servers_html_builder(raw_data: Dict[str, Any], game: str) -> str:
@@ -246,8 +283,11 @@ async def gt_servers_html_builder(raw_data: Dict[str, Any], game: str) -> str:
 
     servers_list_raw = raw_data.get("servers", [])
     servers_objects = [Server.from_dict(s_data) for s_data in servers_list_raw]
+    inlined = await inline_images(items=servers_objects, banner=banner, logo=logo)
+    banner, logo = inlined["banner"], inlined["logo"]
 
-    html = SERVERS_TEMPLATE.render(
+    html = await render_template(
+        SERVERS_TEMPLATE,
         banner=banner,
         logo=logo,
         update_time=update_time,
@@ -0,0 +1,127 @@
+"""
+持久化的接口响应缓存
+响应体压缩后保存在插件数据库中，支持ETag/Last-Modified重新验证和过期数据后台刷新
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from astrbot.api import logger
+
+from .json_util import loads_async
+from ..database.battlefield_db_service import BattleFieldDBService
+
+
+@dataclass
+class CachedResponse:
+    """持久化的响应记录"""
+    cache_key: str
+    body: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    size: int = 0
+
+    @property
+    def age(self) -> float:
+        """距离获取时已经过去的秒数"""
+        return time.time() - self.fetched_at
+
+    def validator_headers(self) -> dict:
+        """构建条件请求头"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpResponseStore:
+    """基于SQLite的接口响应存储"""
+
+    def __init__(self, db_service: BattleFieldDBService, max_stale: float = 6 * 3600):
+        """
+        Args:
+            db_service: 数据库服务
+            max_stale: 过期数据最多还能使用多久(秒)，超过后必须重新请求
+        """
+        self.db_service = db_service
+        self.max_stale = max_stale
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def make_key(key: tuple) -> str:
+        """将请求标识转换为定长的数据库主键"""
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    async def get(self, cache_key: str) -> Optional[CachedResponse]:
+        """读取响应，不存在、超出可用期限或无法解析时返回None"""
+        try:
+            row = await self.db_service.query_http_cache(cache_key)
+        except Exception as e:
+            logger.warning(f"Battlefield Tool 读取响应缓存失败: {e}")
+            return None
+        if row is None:
+            return None
+        if time.time() - row["fetched_at"] > self.max_stale:
+            return None
+        try:
+            raw = zlib.decompress(row["body"])
+            body = await loads_async(raw)
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Battlefield Tool 响应缓存已损坏，忽略: {e}")
+            return None
+        if isinstance(body, dict):
+            # 304重新验证只刷新fetched_at，以它作为数据的更新时间
+            body["__update_time"] = row["fetched_at"]
+        return CachedResponse(cache_key, body, row["etag"], row["last_modified"], row["fetched_at"], len(raw))
+
+    async def put(self, cache_key: str, url: str, body: Any, etag: Optional[str] = None,
+                  last_modified: Optional[str] = None):
+        """保存响应"""
+        try:
+            data = zlib.compress(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+            await self.db_service.upsert_http_cache(cache_key, url, data, etag, last_modified, time.time())
+        except Exception as e:
+            logger.warning(f"Battlefield Tool 保存响应缓存失败: {e}")
+
+    async def touch(self, cache_key: str):
+        """服务端返回304时刷新获取时间"""
+        try:
+            await self.db_service.touch_http_cache(cache_key, time.time())
+        except Exception as e:
+            logger.warning(f"Battlefield Tool 刷新响应缓存失败: {e}")
+
+    async def prune(self):
+        """删除超出可用期限的响应"""
+        try:
+            await self.db_service.delete_http_cache_before(time.time() - self.max_stale)
+        except Exception as e:
+            logger.warning(f"Battlefield Tool 清理响应缓存失败: {e}")
+
+    def schedule_refresh(self, coro_factory: Callable[[], Awaitable[Any]]):
+        """在后台刷新过期数据，异常只记录日志"""
+
+        async def _refresh():
+            try:
+                await coro_factory()
+            except Exception as e:
+                logger.warning(f"Battlefield Tool 后台刷新数据失败: {e}")
+
+        task = asyncio.ensure_future(_refresh())
+        # 保留任务引用，防止被垃圾回收
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def close(self):
+        """取消尚未完成的后台刷新"""
+        for task in list(self._refresh_tasks):
+            task.cancel()
+        if self._refresh_tasks:
+            await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
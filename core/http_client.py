@@ -0,0 +1,56 @@
+"""
+插件共享的HTTP客户端
+所有请求复用同一个连接池，避免每次请求都重新建立TCP和TLS连接
+"""
+
+from typing import Optional
+
+import aiohttp
+
+_shared_session: Optional[aiohttp.ClientSession] = None
+
+
+def create_session(limit: int = 100, limit_per_host: int = 16, dns_cache_ttl: int = 300,
+                   keepalive_timeout: float = 60) -> aiohttp.ClientSession:
+    """
+    创建使用调优连接池的ClientSession
+    Args:
+        limit: 连接池总连接数上限
+        limit_per_host: 单个主机的连接数上限
+        dns_cache_ttl: DNS缓存时间(秒)
+        keepalive_timeout: 空闲连接保持时间(秒)
+    Returns:
+        aiohttp.ClientSession实例
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_cache_ttl,
+        use_dns_cache=True,
+        keepalive_timeout=keepalive_timeout,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+def init_shared_session(**kwargs) -> aiohttp.ClientSession:
+    """创建插件共享的ClientSession，已存在且未关闭时直接返回"""
+    global _shared_session
+    if _shared_session is None or _shared_session.closed:
+        _shared_session = create_session(**kwargs)
+    return _shared_session
+
+
+def get_shared_session() -> Optional[aiohttp.ClientSession]:
+    """获取插件共享的ClientSession，未初始化或已关闭时返回None"""
+    if _shared_session is None or _shared_session.closed:
+        return None
+    return _shared_session
+
+
+async def close_shared_session():
+    """关闭插件共享的ClientSession"""
+    global _shared_session
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
@@ -0,0 +1,180 @@
+"""
+本地图片缓存的容量管理
+定期在后台扫描图片目录，总大小超出预算时按最近访问时间淘汰图片，静态资源始终保留。
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Set, Tuple, Union
+
+from astrbot.api import logger
+
+from .image_store import INDEX_FILE_NAME, ImageStore
+
+# 未完成的临时文件超过这个时间(秒)视为残留
+STALE_TMP_AGE = 3600
+# 两次清理的最小间隔(秒)
+MIN_INTERVAL = 60
+
+
+@dataclass
+class SweepResult:
+    """一次清理的结果"""
+    total_bytes: int
+    freed_bytes: int
+    removed_urls: List[str]
+    removed_files: int
+
+
+def iter_urls(value) -> Iterable[str]:
+    """从字符串、列表或字典中递归取出所有URL"""
+    if isinstance(value, str):
+        if value.startswith(("http://", "https://")):
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_urls(item)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            yield from iter_urls(item)
+
+
+class ImageCacheManager:
+    """图片目录的容量管理器"""
+
+    def __init__(self, store: ImageStore, max_bytes: int, interval: float = 3600,
+                 pinned_urls: Union[Iterable[str], Callable[[], Iterable[str]]] = (), min_idle: float = 600,
+                 low_watermark: float = 0.9, after_sweep: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            store: 图片存储
+            max_bytes: 图片目录的容量预算(字节)，0表示不限制
+            interval: 两次清理的间隔(秒)，不小于MIN_INTERVAL
+            pinned_urls: 永不淘汰的图片URL，也可以是返回URL的函数，第一次清理时才调用
+            min_idle: 最近这段时间(秒)内访问过的图片不淘汰，避免删除正在渲染的图片
+            low_watermark: 超出预算后清理到预算的多少比例为止
+            after_sweep: 每次定期清理后调用的函数，用于输出运行统计
+        """
+        self.store = store
+        self.max_bytes = max_bytes
+        self.interval = max(MIN_INTERVAL, interval)
+        self._pinned_source = pinned_urls
+        self._pinned_urls: Optional[Set[str]] = None
+        self.min_idle = min_idle
+        self.low_watermark = low_watermark
+        self.after_sweep = after_sweep
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pinned_urls(self) -> Set[str]:
+        """永不淘汰的图片URL"""
+        if self._pinned_urls is None:
+            source = self._pinned_source
+            self._pinned_urls = set(source() if callable(source) else source)
+        return self._pinned_urls
+
+    def start(self, initial_delay: float = 60):
+        """启动后台定期清理"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run(initial_delay))
+
+    async def stop(self):
+        """停止后台清理"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, initial_delay: float):
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Battlefield Tool 清理图片缓存失败: {e}")
+            if self.after_sweep is not None:
+                self.after_sweep()
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self) -> SweepResult:
+        """执行一次清理，文件扫描和删除在线程池中进行"""
+        # 在事件循环线程中取索引快照，线程池中不访问索引本身
+        entries = [(e.url, e.path, e.last_access) for e in self.store.index.values()]
+        pinned_paths = {self.store.relative_path_for(url) for url in self.pinned_urls}
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, self._sweep_files, entries, pinned_paths)
+        for url in result.removed_urls:
+            self.store.forget(url)
+        if result.removed_files:
+            logger.info(f"Battlefield Tool 图片缓存清理完成: 删除{result.removed_files}个文件，"
+                        f"释放{result.freed_bytes / 1024 / 1024:.1f}MB，"
+                        f"剩余{(result.total_bytes - result.freed_bytes) / 1024 / 1024:.1f}MB")
+        return result
+
+    def _sweep_files(self, entries: List[Tuple[str, str, float]], pinned_paths: Set[str]) -> SweepResult:
+        """扫描并删除文件(阻塞)"""
+        root = self.store.root_dir
+        now = time.time()
+        url_by_path = {path: (url, last_access) for url, path, last_access in entries}
+        removed_files = 0
+        freed = 0
+        total = 0
+        # (最近访问时间, 相对路径, 大小, URL)
+        candidates = []
+
+        for dir_path, _, file_names in os.walk(root):
+            rel_dir = os.path.relpath(dir_path, root)
+            for file_name in file_names:
+                full_path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                if rel_dir == "." and file_name == INDEX_FILE_NAME:
+                    continue
+                if file_name.startswith(".tmp-"):
+                    if now - stat.st_mtime > STALE_TMP_AGE and self._remove(full_path):
+                        removed_files += 1
+                    continue
+                if rel_dir == ".":
+                    # 旧版按文件名存放的图片已无法通过URL找到
+                    if self._remove(full_path):
+                        removed_files += 1
+                    continue
+                rel_path = os.path.join(rel_dir, file_name)
+                total += stat.st_size
+                if rel_path in pinned_paths:
+                    continue
+                url, last_access = url_by_path.get(rel_path, (None, stat.st_mtime))
+                if now - last_access < self.min_idle:
+                    continue
+                candidates.append((last_access, rel_path, stat.st_size, url))
+
+        removed_urls = []
+        if self.max_bytes and total > self.max_bytes:
+            target = self.max_bytes * self.low_watermark
+            candidates.sort(key=lambda c: c[0])
+            for _, rel_path, size, url in candidates:
+                if total - freed <= target:
+                    break
+                if self._remove(os.path.join(root, rel_path)):
+                    freed += size
+                    removed_files += 1
+                    if url is not None:
+                        removed_urls.append(url)
+        return SweepResult(total, freed, removed_urls, removed_files)
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,161 @@
+"""
+按URL哈希寻址的本地图片存储
+文件名取完整URL的sha256，按哈希前缀分两级目录存放，不同来源的同名图片不会互相覆盖。
+index.json记录每张图片的URL、大小、MIME类型和访问信息，供清理和预热使用。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from astrbot.api import logger
+
+INDEX_FILE_NAME = "index.json"
+
+
+@dataclass
+class ImageIndexEntry:
+    """图片索引记录"""
+    url: str
+    path: str  # 相对于存储根目录的路径
+    size: int
+    mime: str
+    last_access: float
+    hits: int = 0
+
+
+class ImageStore:
+    """图片存储及其索引
+
+    索引只在事件循环线程中修改，磁盘读写由调用方放到线程池中执行。
+    """
+
+    def __init__(self, root_dir: str, flush_delay: float = 30):
+        """
+        Args:
+            root_dir: 存储根目录
+            flush_delay: 索引变化后延迟多久写回磁盘(秒)，合并短时间内的多次修改
+        """
+        self.root_dir = str(root_dir)
+        self.flush_delay = flush_delay
+        self.index: Dict[str, ImageIndexEntry] = {}
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root_dir, INDEX_FILE_NAME)
+
+    @staticmethod
+    def _extension(url: str) -> str:
+        """取URL路径中的扩展名，用于推断MIME类型，不合法时返回空字符串"""
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if 1 < len(ext) <= 6 and ext[1:].isalnum():
+            return ext
+        return ""
+
+    def relative_path_for(self, url: str) -> str:
+        """根据URL计算相对存储路径: ab/cd/<sha256><扩展名>"""
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(digest[:2], digest[2:4], digest + self._extension(url))
+
+    def path_for(self, url: str) -> str:
+        """根据URL计算本地存储的完整路径"""
+        return os.path.join(self.root_dir, self.relative_path_for(url))
+
+    def record_access(self, url: str, size: int, mime: str):
+        """记录一次命中，索引中没有时补建记录"""
+        entry = self.index.get(url)
+        if entry is None:
+            entry = ImageIndexEntry(url, self.relative_path_for(url), size, mime, time.time())
+            self.index[url] = entry
+        entry.size = size
+        entry.mime = mime
+        entry.last_access = time.time()
+        entry.hits += 1
+        self._mark_dirty()
+
+    def record_save(self, url: str, size: int, mime: str):
+        """记录新保存的图片"""
+        self.index[url] = ImageIndexEntry(url, self.relative_path_for(url), size, mime, time.time())
+        self._mark_dirty()
+
+    def forget(self, url: str):
+        """从索引中移除图片记录"""
+        if self.index.pop(url, None) is not None:
+            self._mark_dirty()
+
+    def total_bytes(self) -> int:
+        """索引中所有图片的总大小"""
+        return sum(entry.size for entry in self.index.values())
+
+    def load(self):
+        """从磁盘读取索引(阻塞)，内存中已有的记录优先"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Battlefield Tool 图片索引读取失败，将重新建立: {e}")
+            return
+        for item in raw.get("entries", []):
+            try:
+                entry = ImageIndexEntry(**item)
+            except TypeError:
+                continue
+            self.index.setdefault(entry.url, entry)
+
+    def snapshot(self) -> dict:
+        """生成可序列化的索引快照，在事件循环线程中调用"""
+        return {"version": 1, "entries": [asdict(entry) for entry in self.index.values()]}
+
+    def save(self, snapshot: dict):
+        """原子地写入索引快照(阻塞)"""
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+            tmp_path = None
+        except OSError as e:
+            logger.warning(f"Battlefield Tool 图片索引保存失败: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    async def flush(self):
+        """将索引写回磁盘"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        snapshot = self.snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, self.save, snapshot)
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        asyncio.ensure_future(self.flush())
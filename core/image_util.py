@@ -1,15 +1,31 @@
+import asyncio
 import base64
+import functools
 import os
-from typing import Optional
-from urllib.parse import urlparse
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Optional
 from astrbot.api import logger
 from astrbot.api.star import StarTools
 import mimetypes # 导入 mimetypes 模块
 
+from .cache_util import TTLCache
+from .image_store import ImageStore
 from .request_util import fetch_image
+from ..constants.battlefield_constants import ImageUrls
 
 image_dir = StarTools.get_data_dir("battleField_tool_plugin/images")
 image_dir.mkdir(parents=True, exist_ok=True)
+image_store = ImageStore(image_dir)
+
+# (本地图片路径, 修改时间, 文件大小) -> data URI，按data URI长度限制总占用
+# 文件变化后键随之改变，旧条目不再命中并按LRU顺序淘汰
+data_uri_cache = TTLCache(max_entries=2048, max_bytes=64 * 1024 * 1024, default_ttl=None)
+
+
+async def _run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """在默认线程池中执行阻塞的磁盘IO，避免卡住事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
 
 
 def _get_mime_type(file_path: str) -> str:
@@ -27,14 +43,13 @@ def _get_mime_type(file_path: str) -> str:
 def get_local_image_path(image_url: str) -> str:
     """
     根据图片URL生成本地存储路径。
+    路径由完整URL的哈希决定，不同来源的同名图片不会互相覆盖。
     Args:
         image_url: 图片的URL。
     Returns:
         本地图片文件的完整路径。
     """
-    parsed_url = urlparse(image_url)
-    file_name = os.path.basename(parsed_url.path)
-    return os.path.join(image_dir, file_name)
+    return image_store.path_for(image_url)
 
 
 def image_to_base64(image_path: str) -> Optional[str]:
@@ -91,16 +106,71 @@ def svg_to_base64(svg_path: str) -> Optional[str]:
 def save_image_to_local(image_path: str, image_data: bytes):
     """
     将二进制图片数据保存到本地文件。
+    先写入同目录下的临时文件再重命名，其他请求不会读到写了一半的文件。
     Args:
         image_path: 本地图片文件的完整路径。
         image_data: 图片的二进制数据。
     """
+    tmp_path = None
     try:
-        with open(image_path, "wb") as f:
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(image_path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
             f.write(image_data)
+        os.replace(tmp_path, image_path)
+        tmp_path = None
         logger.debug(f"图片已保存到本地: {image_path}")
     except Exception as e:
         logger.error(f"保存图片到本地失败: {e}")
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _stat_signature(local_path: str) -> Optional[tuple]:
+    """获取文件的(修改时间, 大小)，文件不存在时返回None"""
+    try:
+        stat = os.stat(local_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _encode_local_image(local_path: str) -> Optional[str]:
+    """读取本地图片并转换为Base64编码(阻塞)"""
+    if local_path.lower().endswith(".svg"):
+        return svg_to_base64(local_path)
+    return image_to_base64(local_path)
+
+
+async def _load_local_base64(image_url: str, local_path: str) -> Optional[str]:
+    """
+    读取本地图片并转换为HTML可用的Base64编码，不存在时返回None。
+    编码结果缓存在内存中，文件的修改时间或大小变化后重新读取。磁盘读取在线程池中进行。
+    """
+    signature = await _run_blocking(_stat_signature, local_path)
+    if signature is None:
+        logger.debug(f"图片文件未找到: {local_path}")
+        return None
+
+    image_store.record_access(image_url, signature[1], _get_mime_type(local_path))
+    cache_key = (local_path,) + signature
+    cached = data_uri_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    base64_data = await _run_blocking(_encode_local_image, local_path)
+    if base64_data:
+        data_uri_cache.set(cache_key, base64_data, size=len(base64_data))
+    return base64_data
+
+
+def get_image_cache_stats() -> dict:
+    """获取图片Base64缓存的统计信息"""
+    return data_uri_cache.stats()
 
 
 async def get_image_base64(image_url: str, timeout: int = 15) -> Optional[str]:
@@ -115,33 +185,77 @@ async def get_image_base64(image_url: str, timeout: int = 15) -> Optional[str]:
         如果获取失败则返回None。
     """
     local_path = get_local_image_path(image_url)
-    
-    # 尝试从本地获取
-    base64_data = None
-    if local_path.lower().endswith(".svg"):
-        base64_data = svg_to_base64(local_path)
-    else:
-        base64_data = image_to_base64(local_path)
 
+    # 尝试从本地获取
+    base64_data = await _load_local_base64(image_url, local_path)
     if base64_data:
         logger.debug(f"图片已从本地获取并转换为Base64: {local_path}")
         return base64_data
-    
+
+    return await _fetch_image_base64(image_url, local_path, timeout)
+
+
+async def _fetch_image_base64(image_url: str, local_path: str, timeout: int = 15) -> Optional[str]:
+    """从远程获取图片，保存到本地后转换为Base64编码"""
     logger.debug(f"本地未找到图片，尝试从远程获取: {image_url}")
-    # 本地不存在，从远程获取
     image_data = await fetch_image(image_url, timeout)
     if image_data:
         # 保存到本地
-        save_image_to_local(local_path, image_data)
+        await _run_blocking(save_image_to_local, local_path, image_data)
+        image_store.record_save(image_url, len(image_data), _get_mime_type(local_path))
         # 再次从本地读取并转换为Base64
-        if local_path.lower().endswith(".svg"):
-            base64_data = svg_to_base64(local_path)
-        else:
-            base64_data = image_to_base64(local_path)
-
+        base64_data = await _load_local_base64(image_url, local_path)
         if base64_data:
             logger.debug(f"图片已从远程获取、保存到本地并转换为Base64: {local_path}")
             return base64_data
-    
+
     logger.error(f"无法获取图片并转换为Base64: {image_url}")
     return None
+
+
+async def resolve_images(image_urls: Iterable[str], timeout: int = 15, concurrency: int = 8) -> Dict[str, str]:
+    """
+    批量获取图片的Base64编码。
+    先读取本地已有的图片，剩余的图片在并发数限制下同时从远程获取。
+    Args:
+        image_urls: 图片URL列表，空值和重复项会被忽略。
+        timeout: 单张图片远程请求的超时时间(秒)。
+        concurrency: 同时进行的远程请求数上限。
+    Returns:
+        图片URL -> HTML可用的Base64编码字符串，获取失败的图片不在结果中。
+    """
+    resolved = {}
+    misses = []
+    unique_urls = list(dict.fromkeys(url for url in image_urls if url))
+    local_paths = [get_local_image_path(url) for url in unique_urls]
+    local_data = await asyncio.gather(*[_load_local_base64(url, path) for url, path in zip(unique_urls, local_paths)])
+    for image_url, local_path, base64_data in zip(unique_urls, local_paths, local_data):
+        if base64_data:
+            resolved[image_url] = base64_data
+        else:
+            misses.append((image_url, local_path))
+
+    if misses:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _fetch(image_url: str, local_path: str):
+            async with semaphore:
+                return image_url, await _fetch_image_base64(image_url, local_path, timeout)
+
+        for image_url, base64_data in await asyncio.gather(*[_fetch(url, path) for url, path in misses]):
+            if base64_data:
+                resolved[image_url] = base64_data
+    return resolved
+
+
+async def get_default_avatar_base64(seed: str) -> str:
+    """
+    获取玩家的默认头像。
+    头像由seed稳定决定，优先返回本地缓存的Base64编码，获取失败时返回原URL。
+    Args:
+        seed: 玩家名称或pider等稳定标识。
+    Returns:
+        头像的Base64编码字符串或URL。
+    """
+    avatar_url = ImageUrls.get_default_avatar(seed)
+    return await get_image_base64(avatar_url) or avatar_url
@@ -0,0 +1,51 @@
+"""
+启动时的图片预热
+在后台预先下载并编码Banner、Logo、兵种图和段位图标，避免重启后的第一次查询等待下载。
+"""
+
+import time
+from typing import List
+
+from astrbot.api import logger
+
+from .image_cache_manager import iter_urls
+from .image_util import resolve_images
+from ..constants.battlefield_constants import GameMappings, ImageUrls
+from ..models.btr_entities import PlayerStats
+
+
+def collect_warmup_urls() -> List[str]:
+    """收集所有可枚举的静态图片URL，默认头像数量较多且按需使用，不参与预热"""
+    urls = [url for name, url in ImageUrls.get_all_static_urls().items() if not name.startswith("default_avatar")]
+    urls += iter_urls(GameMappings.BANNERS)
+    urls += iter_urls(GameMappings.LOGOS)
+    urls += PlayerStats.get_all_rank_images()
+    return list(dict.fromkeys(urls))
+
+
+async def warm_up_images(urls: List[str] = None, batch_size: int = 16, concurrency: int = 4, timeout: int = 15):
+    """
+    分批预热图片缓存，每批完成后输出进度
+    Args:
+        urls: 需要预热的图片URL，为None时使用collect_warmup_urls的结果
+        batch_size: 每批的图片数量
+        concurrency: 同时进行的远程请求数上限
+        timeout: 单张图片的超时时间(秒)
+    """
+    if urls is None:
+        urls = collect_warmup_urls()
+    total = len(urls)
+    done = 0
+    failed = 0
+    start = time.monotonic()
+    logger.info(f"Battlefield Tool 开始预热图片缓存，共{total}张")
+    for offset in range(0, total, batch_size):
+        batch = urls[offset:offset + batch_size]
+        resolved = await resolve_images(batch, timeout=timeout, concurrency=concurrency)
+        done += len(batch)
+        failed += len(batch) - len(resolved)
+        # 大约每完成10%输出一次进度
+        if done == total or done // batch_size % max(1, total // batch_size // 10) == 0:
+            logger.info(f"Battlefield Tool 图片预热进度: {done}/{total}")
+    logger.info(f"Battlefield Tool 图片预热完成: {total - failed}/{total}张可用，"
+                f"耗时{time.monotonic() - start:.1f}秒")
@@ -0,0 +1,47 @@
+"""
+JSON解码
+安装了orjson时优先使用，否则使用标准库json；较大的响应体放到线程池中解码，避免阻塞事件循环。
+"""
+
+import asyncio
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson是可选依赖
+    orjson = None
+
+# 超过这个大小(字节)的响应体在线程池中解码
+OFFLOAD_THRESHOLD = 128 * 1024
+
+DECODER_NAME = "orjson" if orjson is not None else "json"
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    解码JSON
+    Args:
+        data: 原始响应体
+    Returns:
+        解码后的数据
+    Raises:
+        json.JSONDecodeError: 不是合法JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson不接受NaN/Infinity等标准库允许的写法，交给标准库再试一次
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+async def loads_async(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """解码JSON，较大的响应体在线程池中解码"""
+    if len(data) < OFFLOAD_THRESHOLD:
+        return loads(data)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, loads, data)
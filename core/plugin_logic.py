@@ -5,24 +5,7 @@ from typing import Union, Pattern
 from ..database.battlefield_db_service import (
     BattleFieldDBService,
 )
-from .gametool.gt_template import (
-    gt_main_html_builder,
-    gt_weapons_html_builder,
-    gt_vehicles_html_builder,
-    gt_servers_html_builder,
-)
-from .btr.btr_template import (
-    btr_main_html_builder,
-    btr_weapons_html_builder,
-    btr_vehicles_html_builder,
-    btr_soldier_html_builder,
-    btr_matches_html_builder,
-)
-
-from .gametool.gt_llm import gt_main_llm_builder
-from .btr.btr_llm import btr_main_llm_builder
-from .gametool.gt_image_generator import GtImageGenerator
-from .btr.btr_image_generator import BtrImageGenerator
+from .render_cache import RenderCache
 
 from ..models.player_data import PlayerDataRequest
 from .exceptions import (
@@ -38,7 +21,7 @@ import time
 
 class BattlefieldPluginLogic:
     def __init__(self, db_service: BattleFieldDBService, default_game: str, timeout_config: int, img_quality: int,
-                 session, bf_prompt: str, default_platform: str = "pc"):
+                 session, bf_prompt: str, default_platform: str = "pc", render_cache_ttl: int = 300):
         self.db_service = db_service
         self.default_game = default_game
         self.timeout_config = timeout_config
@@ -49,14 +32,31 @@ class BattlefieldPluginLogic:
         self.LANG_TW = "zh-tw"
         self.bf_prompt = bf_prompt
         self.SUPPORTED_GAMES = ["bf4", "bf1", "bfv", "bf6", "bf2042"]
+        self.PAGED_DATA_TYPES = ["weapons", "vehicles", "soldiers"]  # 按页渲染的列表
         self.STAT_PATTERN = re.compile(
             r"^([\w-]*)(?:[，,]?game=([\w\-+.]+))?(?:[，,]?pider=([\w\-+.]+))?(?:[，,]?page=(\d+))?$"
         )
         # self.STAT_PATTERN = re.compile(
         #     r"^([\w-]*)(?:[，,]?game=([\w\-+.]+))?$"
         # )
-        self.gt_image_generator = GtImageGenerator(img_quality)
-        self.btr_image_generator = BtrImageGenerator(img_quality)
+        self.render_cache = RenderCache(render_cache_ttl)  # 内容相同的页面复用渲染结果
+        # 图片生成器在第一次查询对应游戏时才创建，插件加载时不导入模板和实体类
+        self._gt_image_generator = None
+        self._btr_image_generator = None
+
+    @property
+    def gt_image_generator(self):
+        if self._gt_image_generator is None:
+            from .gametool.gt_image_generator import GtImageGenerator
+            self._gt_image_generator = GtImageGenerator(self.img_quality, self.render_cache)
+        return self._gt_image_generator
+
+    @property
+    def btr_image_generator(self):
+        if self._btr_image_generator is None:
+            from .btr.btr_image_generator import BtrImageGenerator
+            self._btr_image_generator = BtrImageGenerator(self.img_quality, self.render_cache)
+        return self._btr_image_generator
 
     def get_session_channel_id(self, event: AstrMessageEvent) -> str:
         """根据事件类型获取会话渠道ID"""
@@ -116,11 +116,18 @@ class BattlefieldPluginLogic:
 
     async def handle_btr_response(self, data_type, game, html_render_func, stat_data, weapon_data: list = None,
                                   vehicle_data=None, soldier_data=None, is_llm: bool = False, item_type: str = None,
-                                  ):
-        """处理bf6/bf2042等新API的响应逻辑"""
+                                  page: int = 1):
+        """处理bf6/bf2042等新API的响应逻辑，列表类数据产出(图片URL, 总页数)"""
         if is_llm:
+            from .btr.btr_llm import btr_main_llm_builder
             yield await btr_main_llm_builder(stat_data, weapon_data, vehicle_data, soldier_data, game, self.bf_prompt)
         else:
+            from .btr.btr_template import (
+                btr_main_html_builder,
+                btr_weapons_html_builder,
+                btr_vehicles_html_builder,
+                btr_soldier_html_builder,
+            )
             handler_map = {
                 "stat": (self.btr_image_generator.generate_main_btr_data_pic, btr_main_html_builder),
                 "weapons": (self.btr_image_generator.generate_weapons_btr_data_pic, btr_weapons_html_builder),
@@ -130,6 +137,10 @@ class BattlefieldPluginLogic:
 
             generator_func, html_builder_func = handler_map[data_type]
 
+            if data_type in self.PAGED_DATA_TYPES:
+                yield await generator_func(game, html_render_func, html_builder_func, stat_data, weapon_data,
+                                           vehicle_data, soldier_data, item_type, page)
+                return
             pic_url = await generator_func(game, html_render_func, html_builder_func, stat_data, weapon_data,
                                            vehicle_data,
                                            soldier_data, item_type)
@@ -137,6 +148,7 @@ class BattlefieldPluginLogic:
 
     async def handle_btr_matches_response(self, game,ea_name, html_render_func, stat_data, weapon_data, vehicle_data,
                                  soldier_data, mode_data,maps_data,matches_timestamp,provider):
+        from .btr.btr_template import btr_matches_html_builder
 
         pic_url = await self.btr_image_generator.generate_matches_btr_data_pic(game,ea_name, html_render_func,
                                                                                btr_matches_html_builder, stat_data,
@@ -156,9 +168,10 @@ class BattlefieldPluginLogic:
         return None
 
     async def process_api_response(self, event, api_data, data_type, game, html_render_func, is_llm: bool = False,
-                                   item_type: str = None):
-        """处理API响应通用逻辑"""
+                                   item_type: str = None, page: int = 1):
+        """处理API响应通用逻辑，列表类数据产出(图片URL, 总页数)"""
         if is_llm:
+            from .gametool.gt_llm import gt_main_llm_builder
             yield gt_main_llm_builder(api_data, game, self.bf_prompt)
         else:
             error_msg = self._handle_error_response(api_data)
@@ -166,9 +179,16 @@ class BattlefieldPluginLogic:
                 yield event.plain_result(error_msg)
                 return
 
-            api_data["__update_time"] = time.time()
+            # 缓存的数据保留首次获取的时间
+            api_data.setdefault("__update_time", time.time())
 
             # 根据数据类型调用对应的图片生成方法
+            from .gametool.gt_template import (
+                gt_main_html_builder,
+                gt_weapons_html_builder,
+                gt_vehicles_html_builder,
+                gt_servers_html_builder,
+            )
             handler_map = {
                 "stat": (self.gt_image_generator.generate_main_gt_data_pic, gt_main_html_builder),
                 "weapons": (self.gt_image_generator.generate_weapons_gt_data_pic, gt_weapons_html_builder),
@@ -177,6 +197,9 @@ class BattlefieldPluginLogic:
             }
 
             generator_func, html_builder_func = handler_map[data_type]
+            if data_type in self.PAGED_DATA_TYPES:
+                yield await generator_func(api_data, game, html_render_func, html_builder_func, item_type, page)
+                return
             pic_url = await generator_func(api_data, game, html_render_func, html_builder_func, item_type)
             yield pic_url
 
@@ -325,3 +348,25 @@ class BattlefieldPluginLogic:
                 ea_name = part
 
         return ea_name, game, pider, page, item_type
+
+    def build_next_page_command(self, command: str, request_data: PlayerDataRequest, total_pages: int) -> str:
+        """
+        构建翻页指令
+        Args:
+            command: 指令名
+            request_data: 本次查询的参数
+            total_pages: 总页数
+        Returns:
+            下一页的指令，没有下一页时返回空字符串
+        """
+        page = max(1, request_data.page or 1)
+        if page >= total_pages or page >= 25:
+            return ""
+        params = [request_data.ea_name] if request_data.ea_name else []
+        params.append(f"game={request_data.game}")
+        if request_data.pider:
+            params.append(f"pider={request_data.pider}")
+        if request_data.item_type:
+            params.append(f"type={request_data.item_type}")
+        params.append(f"page={page + 1}")
+        return f"{command} {','.join(params)}"
@@ -0,0 +1,128 @@
+"""
+客户端限流
+按令牌桶限制对同一接口的请求频率，令牌不足时请求按优先级排队，
+预计等待时间超过上限时直接拒绝，避免接口返回频率限制错误。
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional, Tuple
+
+from astrbot.api import logger
+
+from .exceptions import RateLimitError
+
+# 请求优先级，数值越小越先获得令牌
+PRIORITY_INTERACTIVE = 0  # 用户指令
+PRIORITY_LLM = 1  # LLM工具调用
+PRIORITY_BACKGROUND = 2  # 后台刷新缓存
+
+
+class TokenBucketLimiter:
+    """带优先级排队的令牌桶
+
+    所有状态只在事件循环线程中修改。
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None, max_wait: float = 10, name: str = ""):
+        """
+        Args:
+            rate_per_minute: 每分钟补充的令牌数
+            burst: 桶容量，即允许的突发请求数，默认与每分钟令牌数相同
+            max_wait: 单个请求最多排队多久(秒)，预计超出时直接拒绝
+            name: 限流器名称，用于日志
+        """
+        self.rate = max(rate_per_minute, 0.01) / 60
+        self.capacity = max(1, int(burst if burst is not None else rate_per_minute))
+        self.max_wait = max_wait
+        self.name = name
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        # (优先级, 序号, Future)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 统计信息
+        self.total = 0
+        self.rejected = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _estimate_wait(self, priority: int) -> float:
+        """估算该优先级的新请求需要等待的时间(秒)"""
+        ahead = sum(1 for p, _, f in self._waiters if p <= priority and not f.done())
+        return max(0.0, (ahead + 1 - self._tokens) / self.rate)
+
+    def stats(self) -> dict:
+        """获取限流统计信息"""
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "queue_depth": sum(1 for _, _, f in self._waiters if not f.done()),
+            "total": self.total,
+            "rejected": self.rejected,
+        }
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        """
+        取得一个令牌，令牌不足时排队等待
+        Args:
+            priority: 请求优先级
+        Raises:
+            RateLimitError: 预计等待或实际等待超过max_wait
+        """
+        self.total += 1
+        self._refill()
+        if self._tokens >= 1 and not self._waiters:
+            self._tokens -= 1
+            return
+        wait = self._estimate_wait(priority)
+        if wait > self.max_wait:
+            self.rejected += 1
+            raise RateLimitError(f"{self.name} 请求频率超出限制，预计需要等待{wait:.1f}秒", retry_after=wait)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._schedule()
+        logger.debug(f"Battlefield Tool {self.name} 请求进入限流队列，预计等待{wait:.1f}秒")
+        try:
+            # 令牌由_dispatch直接转交，取得时已经扣除
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 令牌已经转交过来，还给桶
+                self._tokens = min(self.capacity, self._tokens + 1)
+                self._schedule()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise RateLimitError(f"{self.name} 请求排队超时: {self.max_wait}秒", retry_after=self.max_wait)
+            raise
+
+    def _schedule(self):
+        """在下一个令牌补充时分配令牌"""
+        if self._timer is not None or not self._waiters:
+            return
+        self._refill()
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        # 丢弃已取消的等待者
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        self._schedule()
@@ -0,0 +1,82 @@
+"""
+渲染结果缓存
+同一模板、同样的页面内容和渲染参数只渲染一次，重复查询直接复用之前生成的图片。
+模板中用<!--volatile-->...<!--/volatile-->包裹的内容(如更新时间)不参与比较。
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Any, Awaitable, Callable, Optional
+
+from astrbot.api import logger
+
+from .cache_util import TTLCache
+
+VOLATILE_PATTERN = re.compile(r"<!--volatile-->.*?<!--/volatile-->", re.S)
+
+
+class RenderCache:
+    """渲染结果缓存，保存渲染函数返回的图片URL或路径"""
+
+    def __init__(self, ttl: float = 300, max_entries: int = 256):
+        """
+        Args:
+            ttl: 渲染结果的有效期(秒)，0表示不缓存
+            max_entries: 最多缓存多少张图片
+        """
+        self.ttl = ttl
+        self._cache = TTLCache(max_entries=max_entries, default_ttl=ttl)
+
+    @staticmethod
+    def make_key(template_name: str, html: str, options: dict) -> str:
+        """根据模板名、去掉易变内容后的HTML和渲染参数计算缓存键"""
+        digest = hashlib.sha256()
+        digest.update(template_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(VOLATILE_PATTERN.sub("", html).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """获取渲染结果，本地图片文件已被删除时视为未命中"""
+        url = self._cache.get(key)
+        if url is None:
+            return None
+        if not url.startswith(("http://", "https://", "data:")) and not os.path.exists(url):
+            self._cache.pop(key)
+            return None
+        return url
+
+    def set(self, key: str, url: str):
+        self._cache.set(key, url, size=len(url))
+
+    def stats(self) -> dict:
+        """获取缓存统计信息"""
+        return self._cache.stats()
+
+    async def render(self, template_name: str, html_render_func: Callable[..., Awaitable[Any]], html: str,
+                     options: dict) -> str:
+        """
+        渲染HTML，内容相同且结果仍在有效期内时直接返回之前的图片
+        Args:
+            template_name: 模板名称
+            html_render_func: HTML渲染函数
+            html: 构建好的HTML
+            options: 渲染参数
+        Returns:
+            图片URL
+        """
+        if not self.ttl:
+            return await html_render_func(html, {}, True, options)
+        key = self.make_key(template_name, html, options)
+        url = self.get(key)
+        if url is not None:
+            logger.debug(f"Battlefield Tool 渲染缓存命中: {template_name}")
+            return url
+        url = await html_render_func(html, {}, True, options)
+        if isinstance(url, str) and url:
+            self.set(key, url)
+        return url
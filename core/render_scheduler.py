@@ -0,0 +1,148 @@
+"""
+渲染调度
+限制同时进行的html_render数量，超出的请求按群组轮流排队，队列已满时直接拒绝。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Optional
+
+from astrbot.api import logger
+
+from .exceptions import RenderBusyError
+
+
+class RenderScheduler:
+    """渲染并发限制器
+
+    空闲名额按群组轮转分配，单个群组连续刷屏不会让其他群组一直等待。
+    所有状态只在事件循环线程中修改。
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 20, max_wait: Optional[float] = 60):
+        """
+        Args:
+            max_concurrency: 同时进行的渲染数上限
+            max_queue: 排队等待的渲染数上限，超出时拒绝新请求
+            max_wait: 单个请求最多排队多久(秒)，None表示不限制
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self._running = 0
+        # 群组 -> 等待中的Future，按轮转顺序排列
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        # 统计信息
+        self.total = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def stats(self) -> dict:
+        """获取调度统计信息"""
+        waited = self.total - self.rejected - self.timed_out
+        return {
+            "running": self._running,
+            "queue_depth": self._queued,
+            "total": self.total,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait": round(self.total_wait / waited, 3) if waited > 0 else 0.0,
+            "max_wait": round(self.max_wait_seen, 3),
+        }
+
+    async def run(self, group: str, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        取得渲染名额后执行coro_factory
+        Args:
+            group: 请求来源(群组或私聊会话)，用于轮转排队
+            coro_factory: 返回渲染协程的函数
+        Returns:
+            渲染结果
+        Raises:
+            RenderBusyError: 队列已满或排队超时
+        """
+        self.total += 1
+        start = time.monotonic()
+        await self._acquire(group)
+        waited = time.monotonic() - start
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+        if waited > 1:
+            logger.debug(f"Battlefield Tool 渲染排队{waited:.1f}秒，当前队列: {self._queued}")
+        try:
+            return await coro_factory()
+        finally:
+            self._release()
+
+    def wrap(self, html_render_func: Callable[..., Awaitable[Any]], group: str) -> Callable[..., Awaitable[Any]]:
+        """包装渲染函数，使其经过调度"""
+
+        async def _render(*args, **kwargs):
+            return await self.run(group, lambda: html_render_func(*args, **kwargs))
+
+        return _render
+
+    async def _acquire(self, group: str):
+        if self._running < self.max_concurrency and not self._queued:
+            self._running += 1
+            return
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise RenderBusyError(f"渲染队列已满: {self._queued}/{self.max_queue}")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(group, deque()).append(future)
+        self._queued += 1
+        try:
+            # 名额由_release直接转交，取得时_running已经计入
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 名额已经转交过来，交给下一个请求
+                self._release()
+            else:
+                future.cancel()
+                self._remove_waiter(group, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise RenderBusyError(f"渲染排队超时: {self.max_wait}秒")
+            raise
+
+    def _remove_waiter(self, group: str, future: asyncio.Future):
+        waiters = self._waiters.get(group)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(future)
+            self._queued -= 1
+        except ValueError:
+            return
+        if not waiters:
+            del self._waiters[group]
+
+    def _release(self):
+        """释放名额，有排队请求时按群组轮转转交"""
+        while self._waiters:
+            group, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            self._queued -= 1
+            # 该群组移到队尾，下一次轮到其他群组
+            del self._waiters[group]
+            if waiters:
+                self._waiters[group] = waiters
+            if not future.done():
+                future.set_result(None)
+                return
+        self._running -= 1
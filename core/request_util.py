@@ -1,10 +1,18 @@
 import json
+import time
 import asyncio
 import aiohttp
+from urllib.parse import urlparse
 
 from astrbot.api import logger
-from typing import Optional
-from .exceptions import NetworkError, APIError, DataParseError, TimeoutError, UserInputError,PrivateDataError,UserNotFoundError
+from typing import Any, Awaitable, Callable, Dict, Optional
+from .cache_util import TTLCache
+from .http_client import get_shared_session
+from .exceptions import NetworkError, APIError, DataParseError, TimeoutError, UserInputError,PrivateDataError,UserNotFoundError,ServerResponseError
+from .rate_limiter import TokenBucketLimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from .circuit_breaker import CircuitBreaker
+from .json_util import loads_async
+from .retry_policy import RETRYABLE_STATUSES, RetryBudget, RetryPolicy, parse_retry_after
 
 
 
@@ -13,8 +21,239 @@ BTR_API_SITE = "https://battlefield.shooting-star-c.top/api"
 # BTR_API_SITE = "http://localhost:8766/api"
 SUPPORTED_GAMES = ["bf4","bf1", "bfv"]
 
+# gametools响应缓存的过期时间(秒)，按请求属性区分
+GT_CACHE_TTL = {
+    "all": 300,
+    "stats": 300,
+    "weapons": 300,
+    "vehicles": 300,
+    "servers": 30,
+}
+# all接口返回的数据包含武器和载具，查询这些属性时可以直接复用all的缓存
+GT_CACHE_FALLBACK_PROPS = {
+    "weapons": ["all"],
+    "vehicles": ["all"],
+    "stats": ["all"],
+}
+# BTR响应在持久化缓存中保持新鲜的时间(秒)
+BTR_CACHE_TTL = 300
+gt_response_cache = TTLCache(max_entries=256, max_bytes=64 * 1024 * 1024, default_ttl=300)
+# 正在进行中的请求，用于合并并发的相同请求，值为[请求任务, 等待者数量]
+_inflight_requests: Dict[tuple, list] = {}
+# BTR接口每分钟允许的请求数，分别对应没有和有ssc_token的情况
+BTR_RATE_LIMITS = {"anonymous": 5, "token": 60}
+# 限流排队的最长等待时间(秒)
+BTR_RATE_LIMIT_MAX_WAIT = 10
+# (接口域名, ssc_token) -> 令牌桶
+_rate_limiters: Dict[tuple, TokenBucketLimiter] = {}
+# 熔断参数: 连续失败次数阈值、熔断时间(秒)
+BREAKER_SETTINGS = {"failure_threshold": 5, "reset_timeout": 30}
+# 是否对gametools请求启用对冲请求
+GT_HEDGE_REQUESTS = False
+# 接口地址(不含参数) -> 熔断器
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+# 所有GET请求共用的重试策略和重试预算
+retry_policy = RetryPolicy()
 
-async def gt_request_api(game, prop="stats", params=None, timeout=15, session=None):
+
+def configure_retry_policy(max_attempts: int = None, base_delay: float = None, max_delay: float = None,
+                           budget_ratio: float = None):
+    """
+    设置GET请求的重试参数
+    Args:
+        max_attempts: 最多尝试次数(包括第一次)，1表示不重试
+        base_delay: 第一次重试的退避基数(秒)
+        max_delay: 单次退避的上限(秒)
+        budget_ratio: 重试次数相对请求数的上限比例
+    """
+    global retry_policy
+    retry_policy = RetryPolicy(
+        max_attempts if max_attempts is not None else retry_policy.max_attempts,
+        base_delay if base_delay is not None else retry_policy.base_delay,
+        max_delay if max_delay is not None else retry_policy.max_delay,
+        RetryBudget(budget_ratio) if budget_ratio is not None else retry_policy.budget,
+    )
+
+
+def get_request_stats() -> dict:
+    """获取请求重试、熔断和限流的统计信息"""
+    return {
+        "retry": retry_policy.stats(),
+        "breakers": {url: breaker.stats() for url, breaker in _circuit_breakers.items()},
+        "rate_limiters": {f"{host}({'token' if token else 'anonymous'})": limiter.stats()
+                          for (host, token), limiter in _rate_limiters.items()},
+    }
+
+
+def configure_rate_limits(anonymous_per_minute: float = None, token_per_minute: float = None,
+                          max_wait: float = None):
+    """
+    设置BTR接口的限流参数，已创建的令牌桶会被丢弃
+    Args:
+        anonymous_per_minute: 没有ssc_token时每分钟的请求数
+        token_per_minute: 有ssc_token时每分钟的请求数
+        max_wait: 限流排队的最长等待时间(秒)
+    """
+    global BTR_RATE_LIMIT_MAX_WAIT
+    if anonymous_per_minute is not None:
+        BTR_RATE_LIMITS["anonymous"] = anonymous_per_minute
+    if token_per_minute is not None:
+        BTR_RATE_LIMITS["token"] = token_per_minute
+    if max_wait is not None:
+        BTR_RATE_LIMIT_MAX_WAIT = max_wait
+    _rate_limiters.clear()
+
+
+def configure_circuit_breakers(failure_threshold: int = None, reset_timeout: float = None, gt_hedge: bool = None):
+    """
+    设置接口熔断和对冲请求参数，已创建的熔断器会被丢弃
+    Args:
+        failure_threshold: 连续失败多少次后熔断，0表示不熔断
+        reset_timeout: 熔断多久(秒)后放行探测请求
+        gt_hedge: 是否对gametools请求启用对冲请求
+    """
+    global GT_HEDGE_REQUESTS
+    if failure_threshold is not None:
+        BREAKER_SETTINGS["failure_threshold"] = failure_threshold
+    if reset_timeout is not None:
+        BREAKER_SETTINGS["reset_timeout"] = reset_timeout
+    if gt_hedge is not None:
+        GT_HEDGE_REQUESTS = gt_hedge
+    _circuit_breakers.clear()
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """获取接口对应的熔断器，每个接口地址一个"""
+    breaker = _circuit_breakers.get(url)
+    if breaker is None:
+        # 阈值为0时不熔断，熔断器仍用于统计耗时
+        threshold = BREAKER_SETTINGS["failure_threshold"] or float("inf")
+        breaker = _circuit_breakers[url] = CircuitBreaker(urlparse(url).path, threshold,
+                                                          BREAKER_SETTINGS["reset_timeout"])
+    return breaker
+
+
+def btr_request_budget(timeout: float) -> float:
+    """
+    单个BTR请求的最长总耗时：首次限流排队，加上重试阶段(截止时间内的请求和重试前的排队)，
+    再加上截止前发起的最后一次请求
+    Args:
+        timeout: 单次HTTP请求的超时时间(秒)，也是重试的截止时间
+    Returns:
+        总耗时上限(秒)
+    """
+    return BTR_RATE_LIMIT_MAX_WAIT + timeout + max(timeout, BTR_RATE_LIMIT_MAX_WAIT)
+
+
+def get_rate_limiter(url: str, token: str = "") -> Optional[TokenBucketLimiter]:
+    """
+    获取接口对应的令牌桶，同一域名和token共用一个
+    Args:
+        url: 请求地址
+        token: ssc_token，为空表示匿名请求
+    Returns:
+        令牌桶，对应的频率配置为0时返回None表示不限流
+    """
+    host = urlparse(url).netloc
+    key = (host, token)
+    limiter = _rate_limiters.get(key)
+    if limiter is None:
+        rate = BTR_RATE_LIMITS["token" if token else "anonymous"]
+        if not rate:
+            return None
+        name = f"{host}({'token' if token else '匿名'})"
+        limiter = _rate_limiters[key] = TokenBucketLimiter(rate, max_wait=BTR_RATE_LIMIT_MAX_WAIT, name=name)
+    return limiter
+
+
+def make_cache_key(game: str, prop: str, params: Optional[dict] = None) -> tuple:
+    """
+    生成请求缓存键，参数顺序和值类型不影响结果
+    Args:
+        game: 游戏代号
+        prop: 请求属性
+        params: 查询参数
+    Returns:
+        可哈希的缓存键
+    """
+    normalized = tuple(sorted((str(k), str(v).strip()) for k, v in (params or {}).items() if v is not None))
+    return game, prop, normalized
+
+
+def _get_cached_gt_response(game: str, prop: str, params: dict) -> Optional[dict]:
+    """从缓存中读取gametools响应，返回浅拷贝避免调用方修改缓存内容"""
+    for cache_prop in [prop] + GT_CACHE_FALLBACK_PROPS.get(prop, []):
+        cached = gt_response_cache.get(make_cache_key(game, cache_prop, params))
+        if cached is not None:
+            logger.debug(f"Battlefield Tool 命中gametools缓存: {game}/{cache_prop}，请求属性: {prop}")
+            return dict(cached)
+    return None
+
+
+def _on_flight_done(key: tuple, task: asyncio.Task):
+    """请求结束后移除登记，并取走异常避免无人等待时产生告警"""
+    entry = _inflight_requests.get(key)
+    if entry is not None and entry[0] is task:
+        del _inflight_requests[key]
+    if not task.cancelled():
+        task.exception()
+
+
+async def single_flight(key: tuple, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    合并并发的相同请求，同一时刻相同key只会发起一次请求
+    Args:
+        key: 请求标识，一般由接口地址和规范化后的参数组成
+        coro_factory: 创建实际请求协程的函数
+    Returns:
+        请求结果，所有等待者共享同一个结果或异常
+    """
+    entry = _inflight_requests.get(key)
+    if entry is None:
+        task = asyncio.ensure_future(coro_factory())
+        entry = _inflight_requests[key] = [task, 0]
+        task.add_done_callback(lambda t: _on_flight_done(key, t))
+    else:
+        logger.debug(f"Battlefield Tool 合并重复请求: {key}")
+    task = entry[0]
+    entry[1] += 1
+    try:
+        # shield保证某个调用方被取消时不会影响其他等待者
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        # 最后一个等待者也取消了，实际请求没有必要继续
+        if entry[1] == 1 and not task.done():
+            task.cancel()
+        raise
+    finally:
+        entry[1] -= 1
+
+
+async def _load_with_store(store, request_key: tuple, fresh_ttl: float, fetch: Callable[[Any], Awaitable[Any]]):
+    """
+    优先使用持久化缓存：新鲜的数据直接返回，过期但仍在可用期限内的数据立即返回并在后台刷新
+    Args:
+        store: HttpResponseStore实例，为None时直接请求
+        request_key: 请求标识
+        fresh_ttl: 数据保持新鲜的时间(秒)
+        fetch: 发起实际请求的函数，参数为用于条件请求的缓存记录(可能为None)
+    Returns:
+        响应数据
+    """
+    if store is None:
+        return await fetch(None)
+    entry = await store.get(store.make_key(request_key))
+    if entry is None:
+        return await fetch(None)
+    if entry.age <= fresh_ttl:
+        logger.debug(f"Battlefield Tool 命中持久化缓存: {request_key}")
+        return entry.body
+    logger.debug(f"Battlefield Tool 使用过期缓存并在后台刷新: {request_key}，已过期{round(entry.age - fresh_ttl)}秒")
+    store.schedule_refresh(lambda: single_flight(("refresh",) + request_key, lambda: fetch(entry)))
+    return entry.body
+
+
+async def gt_request_api(game, prop="stats", params=None, timeout=15, session=None, use_cache=True, store=None):
     """
     异步请求API
         Args:
@@ -23,6 +262,8 @@ async def gt_request_api(game, prop="stats", params=None, timeout=15, session=No
         params: 查询参数
         timeout: 超时时间(秒)
         session: 可选的aiohttp.ClientSession实例
+        use_cache: 是否使用进程内响应缓存
+        store: 可选的HttpResponseStore实例，用于持久化响应
     Returns:
         JSON响应数据
     Raises:
@@ -31,26 +272,76 @@ async def gt_request_api(game, prop="stats", params=None, timeout=15, session=No
     """
     if params is None:
         params = {}
+    if use_cache:
+        cached = _get_cached_gt_response(game, prop, params)
+        if cached is not None:
+            return cached
     url = GAMETOOLS_API_SITE + f"{game}/{prop}"
+    request_key = ("gt", url, make_cache_key(game, prop, params))
+    fresh_ttl = GT_CACHE_TTL.get(prop, gt_response_cache.default_ttl)
+
+    breaker = get_circuit_breaker(url)
+
+    async def fetch(entry):
+        result, size = await breaker.call(
+            lambda: retry_policy.run(
+                lambda: _gt_fetch(url, params, timeout, session, request_key, store, entry), url, timeout
+            ),
+            hedge=GT_HEDGE_REQUESTS, max_hedge_delay=timeout / 2,
+        )
+        if use_cache:
+            gt_response_cache.set(make_cache_key(game, prop, params), result, size, fresh_ttl)
+        return result
+
+    result = await single_flight(request_key, lambda: _load_with_store(store, request_key, fresh_ttl, fetch))
+    # 合并请求的调用方共享同一个结果，各自拿到浅拷贝
+    return dict(result)
+
+
+async def _gt_fetch(url, params, timeout, session, request_key, store=None, entry=None):
+    """
+    实际发起gametools请求，成功时写入持久化缓存
+    Returns:
+        tuple: (响应数据, 响应体字节数)
+    """
     logger.info(f"Battlefield Tool Request Gametools API: {url}，请求参数: {params}")
+    headers = entry.validator_headers() if entry else {}
 
+    if session is None:
+        session = get_shared_session()
+    # 共享会话不可用时才临时创建
     should_close = session is None
     if should_close:
         session = aiohttp.ClientSession()
 
     try:
         timeout_obj = aiohttp.ClientTimeout(total=timeout)
-        async with session.get(url, params=params, timeout=timeout_obj) as response:
-            if response.status == 200:
-                result = await response.json()
+        async with session.get(url, params=params, timeout=timeout_obj, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                # 数据没有变化，沿用缓存的响应体
+                await store.touch(entry.cache_key)
+                result = entry.body
+                result["__update_time"] = time.time()
+                return result, entry.size
+            elif response.status == 200:
+                raw = await response.read()
+                result = await loads_async(raw)
                 result["code"] = response.status
-                return result
+                # 记录数据获取时间，缓存命中时展示的仍是真实的更新时间
+                result["__update_time"] = time.time()
+                if store is not None:
+                    await store.put(store.make_key(request_key), url, result,
+                                    response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return result, len(raw)
             elif response.status == 404:
                 raise UserNotFoundError(params.get("name"))
             else:
-                result = await response.json()
-                logger.error(f"Battlefield Tool 调用接口失败，原始错误信息{result}")
-                raise Exception
+                result = await response.text()
+                logger.error(f"Battlefield Tool 调用接口失败，状态码: {response.status}，原始错误信息{result[:500]}")
+                if response.status in RETRYABLE_STATUSES:
+                    raise ServerResponseError(response.status,
+                                              retry_after=parse_retry_after(response.headers.get("Retry-After")))
+                raise APIError(f"接口返回错误状态码: {response.status}")
     except aiohttp.ClientError as e:
         error_msg = f"网络请求异常: {str(e)}"
         logger.error(error_msg)
@@ -70,17 +361,33 @@ async def gt_request_api(game, prop="stats", params=None, timeout=15, session=No
 
 async def fetch_image(url: str, timeout: int = 15, session: Optional[aiohttp.ClientSession] = None) -> Optional[bytes]:
     """
-    异步获取图片
+    异步获取图片，临时错误按重试策略重试
     Args:
         url: 图片的URL
         timeout: 超时时间(秒)
-        session: 可选的aiohttp.ClientSession实例
+        session: 可选的aiohttp.ClientSession实例，默认使用插件共享的会话
     Returns:
         图片的二进制内容，如果失败则返回None
+    """
+    try:
+        return await retry_policy.run(lambda: _fetch_image_once(url, timeout, session), url, timeout)
+    except (NetworkError, TimeoutError, ServerResponseError):
+        return None
+
+
+async def _fetch_image_once(url: str, timeout: int, session: Optional[aiohttp.ClientSession]) -> Optional[bytes]:
+    """
+    获取一次图片
+    Returns:
+        图片的二进制内容，非临时错误时返回None
     Raises:
-        aiohttp.ClientError: 网络或HTTP错误
-        asyncio.TimeoutError: 请求超时
+        NetworkError: 网络错误
+        TimeoutError: 请求超时
+        ServerResponseError: 429或5xx响应
     """
+    if session is None:
+        session = get_shared_session()
+    # 共享会话不可用时才临时创建
     should_close = session is None
     if should_close:
         session = aiohttp.ClientSession()
@@ -92,20 +399,24 @@ async def fetch_image(url: str, timeout: int = 15, session: Optional[aiohttp.Cli
                 return await response.read()
             else:
                 logger.error(f"Battlefield Tool Failed to fetch image from {url}, status: {response.status}")
+                if response.status in RETRYABLE_STATUSES:
+                    raise ServerResponseError(response.status,
+                                              retry_after=parse_retry_after(response.headers.get("Retry-After")))
                 return None
     except aiohttp.ClientError as e:
         logger.error(f"Battlefield Tool Network request error while fetching image from {url}: {str(e)}")
-        return None
-    except asyncio.TimeoutError:
+        raise NetworkError(str(e)) from e
+    except asyncio.TimeoutError as e:
         logger.error(f"Battlefield Tool Request timeout while fetching image from {url} after {timeout} seconds")
-        return None
+        raise TimeoutError(f"请求超时: {timeout}秒内未收到响应") from e
     finally:
         if should_close and session is not None:
             await session.close()
 
 
 
-async def btr_request_api(prop: str, params: Optional[dict] = None, timeout: int = 15,ssc_token= "", session: Optional[aiohttp.ClientSession] = None):
+async def btr_request_api(prop: str, params: Optional[dict] = None, timeout: int = 15,ssc_token= "", session: Optional[aiohttp.ClientSession] = None, store=None,
+                          priority: int = PRIORITY_INTERACTIVE):
     """
     异步请求BTR API
         Args:
@@ -113,7 +424,8 @@ async def btr_request_api(prop: str, params: Optional[dict] = None, timeout: int
         params: 查询参数
         timeout: 超时时间(秒)
         session: 可选的aiohttp.ClientSession实例
-        headers: 可选的请求头字典
+        store: 可选的HttpResponseStore实例，用于持久化响应
+        priority: 限流排队时的优先级
     Returns:
         JSON响应数据
     Raises:
@@ -137,8 +449,38 @@ async def btr_request_api(prop: str, params: Optional[dict] = None, timeout: int
     if params.get("pider") is None:
         params["pider"] = ""
 
+    request_key = ("btr", url, make_cache_key("btr", prop, params))
+    limiter = get_rate_limiter(url, ssc_token)
+    breaker = get_circuit_breaker(url)
+
+    async def fetch(entry):
+        # 熔断中的接口不占用令牌
+        breaker.check()
+        # 带缓存记录的请求只会来自后台刷新
+        request_priority = PRIORITY_BACKGROUND if entry is not None else priority
+        if limiter is not None:
+            await limiter.acquire(request_priority)
+        # 重试同样需要令牌
+        before_retry = (lambda: limiter.acquire(request_priority)) if limiter is not None else None
+        return await breaker.call(
+            lambda: retry_policy.run(
+                lambda: _btr_fetch(url, params, timeout, headers, has_token, session, request_key, store, entry),
+                url, timeout, before_retry,
+            )
+        )
+
+    return await single_flight(request_key, lambda: _load_with_store(store, request_key, BTR_CACHE_TTL, fetch))
+
+
+async def _btr_fetch(url, params, timeout, headers, has_token, session, request_key, store=None, entry=None):
+    """实际发起BTR请求，成功时写入持久化缓存"""
     logger.info(f"Battlefield Tool Request API: {url}，请求参数: {params}, 是否有ssc_token: {has_token}")
+    if entry is not None:
+        headers = {**headers, **entry.validator_headers()}
 
+    if session is None:
+        session = get_shared_session()
+    # 共享会话不可用时才临时创建
     should_close = session is None
     if should_close:
         session = aiohttp.ClientSession()
@@ -146,13 +488,29 @@ async def btr_request_api(prop: str, params: Optional[dict] = None, timeout: int
     try:
         timeout_obj = aiohttp.ClientTimeout(total=timeout)
         async with session.get(url, params=params, timeout=timeout_obj, headers=headers) as response:
-            if response.status == 200:
-                result = await response.json()
+            if response.status == 304 and entry is not None:
+                await store.touch(entry.cache_key)
+                result = entry.body
+                if isinstance(result, dict):
+                    result["__update_time"] = time.time()
+                return result
+            elif response.status == 200:
+                result = await loads_async(await response.read())
+                # 记录数据获取时间，多用户查询时返回的是列表
+                if isinstance(result, dict):
+                    result["__update_time"] = time.time()
+                if store is not None:
+                    await store.put(store.make_key(request_key), url, result,
+                                    response.headers.get("ETag"), response.headers.get("Last-Modified"))
                 return result
             elif response.status == 403:
                 raise PrivateDataError()
             elif response.status == 404:
                 raise UserNotFoundError(params["player_name"])
+            elif response.status in RETRYABLE_STATUSES:
+                logger.error(f"Battlefield Tool 调用接口失败，状态码: {response.status}")
+                raise ServerResponseError(response.status,
+                                          retry_after=parse_retry_after(response.headers.get("Retry-After")))
             else:
                 error_dict = await response.json()
                 error_msg = (
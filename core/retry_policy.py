@@ -0,0 +1,157 @@
+"""
+幂等GET请求的重试策略
+网络异常、超时以及429/5xx响应按上限指数退避加全抖动重试，响应带Retry-After时按其等待。
+所有请求共享一个重试预算，重试次数不超过请求数的一定比例，接口故障时重试不会放大请求量。
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from astrbot.api import logger
+
+from .exceptions import NetworkError, ServerResponseError, TimeoutError
+
+# 需要重试的HTTP状态码
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析Retry-After响应头
+    Args:
+        value: 秒数或HTTP日期
+    Returns:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """判断异常是否是可以重试的临时错误"""
+    if isinstance(error, ServerResponseError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (NetworkError, TimeoutError))
+
+
+class RetryBudget:
+    """重试预算
+
+    每个请求存入ratio个令牌，每次重试取出一个，令牌不足时不再重试。
+    """
+
+    def __init__(self, ratio: float = 0.2, capacity: float = 10):
+        """
+        Args:
+            ratio: 重试次数相对请求数的上限比例
+            capacity: 最多积累的令牌数，也是空闲后允许的突发重试数
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+
+    def deposit(self):
+        self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RetryPolicy:
+    """上限指数退避加全抖动的重试策略"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 5,
+                 budget: Optional[RetryBudget] = None):
+        """
+        Args:
+            max_attempts: 最多尝试次数(包括第一次)，1表示不重试
+            base_delay: 第一次重试的退避基数(秒)
+            max_delay: 单次退避的上限(秒)
+            budget: 共享的重试预算
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else RetryBudget()
+        # 统计信息
+        self.calls = 0
+        self.retries = 0
+        self.recovered = 0
+        self.budget_exhausted = 0
+
+    def stats(self) -> dict:
+        """获取重试统计信息"""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "budget_exhausted": self.budget_exhausted,
+        }
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次失败后的退避时间：在[0, min(上限, 基数*2^(attempt-1))]中均匀随机"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def run(self, coro_factory: Callable[[], Awaitable[Any]], name: str = "",
+                  deadline: Optional[float] = None,
+                  before_retry: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """
+        执行请求，失败时按策略重试
+        Args:
+            coro_factory: 创建请求协程的函数，必须是幂等请求
+            name: 请求名称，用于日志
+            deadline: 整体耗时上限(秒)，等待后会超出或已经超出时不再重试
+            before_retry: 每次重试前调用的协程函数，如等待限流令牌，等待时间计入deadline
+        Returns:
+            请求结果，重试用尽时抛出最后一次的异常
+        """
+        self.calls += 1
+        self.budget.deposit()
+        start = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                result = await coro_factory()
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    if attempt > 1:
+                        logger.warning(f"Battlefield Tool 请求{name}重试{attempt - 1}次后仍失败: {e}")
+                    raise
+                delay = self.backoff(attempt)
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if deadline is not None and time.monotonic() - start + delay > deadline:
+                    raise
+                if not self.budget.withdraw():
+                    self.budget_exhausted += 1
+                    logger.debug(f"Battlefield Tool 重试预算不足，不再重试{name}")
+                    raise
+                self.retries += 1
+                logger.info(f"Battlefield Tool 请求{name}第{attempt}次失败({e})，{delay:.2f}秒后重试")
+                await asyncio.sleep(delay)
+                if before_retry is not None:
+                    await before_retry()
+                    # 排队等待的时间同样计入整体耗时
+                    if deadline is not None and time.monotonic() - start >= deadline:
+                        logger.debug(f"Battlefield Tool 等待重试时超过耗时上限，不再重试{name}")
+                        raise
+                attempt += 1
+                continue
+            if attempt > 1:
+                self.recovered += 1
+                logger.info(f"Battlefield Tool 请求{name}第{attempt}次尝试成功")
+            return result
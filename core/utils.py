@@ -1,5 +1,9 @@
+import asyncio
+import functools
 from datetime import datetime, timezone, timedelta
 
+from .exceptions import InvalidParameterError
+
 def format_large_number(number: int) -> str:
     """
     格式化大数字，例如将 1234567 格式化为 1.2M。
@@ -58,3 +62,40 @@ def format_datetime_string(dt_string: str) -> str:
         return f"{formatted_date} {time_period}{formatted_time}"
     except ValueError:
         return f"无效日期时间字符串: {dt_string}"
+
+def paginate(items: list, page: int, page_size: int) -> tuple:
+    """
+    取出列表中指定页的数据。
+    Args:
+        items: 完整列表
+        page: 页码，从1开始
+        page_size: 每页数量
+    Returns:
+        tuple: (当前页数据, 总页数)
+    Raises:
+        InvalidParameterError: 页码超出总页数
+    """
+    total_pages = max(1, -(-len(items) // page_size))
+    page = max(1, page or 1)
+    if page > total_pages:
+        raise InvalidParameterError("page", str(page), f"1-{total_pages}")
+    start = (page - 1) * page_size
+    return items[start:start + page_size], total_pages
+
+
+def _render_template_sync(name: str, context: dict) -> str:
+    from ..constants.battlefield_constants import TemplateConstants  # 常量模块较重，第一次渲染时才导入
+    return TemplateConstants.get_template(name).render(**context)
+
+
+async def render_template(name: str, **context) -> str:
+    """
+    在线程池中渲染模板，大列表渲染和首次编译模板时不阻塞事件循环
+    Args:
+        name: 模板名称，见TemplateConstants.TEMPLATE_FILES
+        **context: 模板变量
+    Returns:
+        渲染后的HTML
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(_render_template_sync, name, context))
@@ -62,3 +62,44 @@ class BattleFieldDBService:
             (session_channel_id,),
             fetch_all=False,
         )
+
+    async def query_http_cache(self, cache_key: str) -> Optional[Dict]:
+        """查询持久化的接口响应"""
+        return await self.db.query(
+            "SELECT * FROM battleField_http_cache WHERE cache_key = ?",
+            (cache_key,),
+            fetch_all=False,
+        )
+
+    async def upsert_http_cache(
+        self, cache_key: str, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str],
+        fetched_at: float
+    ):
+        """更新或插入持久化的接口响应"""
+        await self.db.exec_sql(
+            """
+            INSERT INTO battleField_http_cache (cache_key, url, body, etag, last_modified, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(cache_key) DO
+            UPDATE SET
+                url = excluded.url,
+                body = excluded.body,
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                fetched_at = excluded.fetched_at
+            """,
+            (cache_key, url, body, etag, last_modified, fetched_at),
+        )
+
+    async def touch_http_cache(self, cache_key: str, fetched_at: float):
+        """重新验证通过后刷新响应的获取时间"""
+        await self.db.exec_sql(
+            "UPDATE battleField_http_cache SET fetched_at = ? WHERE cache_key = ?",
+            (fetched_at, cache_key),
+        )
+
+    async def delete_http_cache_before(self, fetched_before: float):
+        """删除指定时间之前获取的响应"""
+        await self.db.exec_sql(
+            "DELETE FROM battleField_http_cache WHERE fetched_at < ?",
+            (fetched_before,),
+        )
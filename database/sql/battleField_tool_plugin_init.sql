@@ -9,4 +9,14 @@ create TABLE IF NOT EXISTS battleField_session_tags
 (
     session_channel_id VARCHAR(32) PRIMARY KEY,
     default_game_tag TEXT NOT NULL
-)
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS battleField_http_cache
+(
+    cache_key VARCHAR(64) PRIMARY KEY,
+    url TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+);
@@ -1,3 +1,5 @@
+import asyncio
+
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, StarTools, register
 from astrbot.api.all import AstrBotConfig
@@ -7,14 +9,17 @@ from .database.battlefield_database import BattleFieldDataBase
 from .database.battlefield_db_service import BattleFieldDBService
 from .core.plugin_logic import BattlefieldPluginLogic
 from .core.api_handlers import ApiHandlers
+from .core.http_cache import HttpResponseStore
+from .core.http_client import init_shared_session, close_shared_session
+from .core.request_util import (configure_rate_limits, configure_circuit_breakers, configure_retry_policy,
+                                get_request_stats)
+from .core.image_cache_manager import ImageCacheManager
 from .core.decorators import handle_exceptions
 from .core.exceptions import (
     UserInputError, PermissionError, ProviderNotConfiguredError,
     GameNotSupportedForOperationError, InvalidParameterError, PermissionDeniedError
 )
 
-import aiohttp
-
 
 @register(
     "astrbot_plugin_battlefield_tool",  # name
@@ -32,29 +37,106 @@ class BattlefieldTool(Star):
         self.default_game = config.get("default_game", "bfv")
         self.timeout_config = config.get("timeout_config", 15)
         self.img_quality = config.get("img_quality", 90)
+        self.render_cache_ttl = config.get("render_cache_ttl", 300)
+        self.render_max_concurrency = config.get("render_max_concurrency", 2)
+        self.render_max_queue = config.get("render_max_queue", 20)
         self.ssc_token = config.get("ssc_token", "")
+        self.image_warmup = config.get("image_warmup", True)
+        self.image_cache_max_mb = config.get("image_cache_max_mb", 500)
+        self.image_cache_sweep_minutes = config.get("image_cache_sweep_minutes", 60)
         self.evaluation_provider = config.get("evaluation_provider", None)
+        configure_rate_limits(config.get("btr_rate_limit_per_minute", 5),
+                              config.get("btr_token_rate_limit_per_minute", 60),
+                              config.get("rate_limit_max_wait", 10))
+        configure_circuit_breakers(config.get("circuit_breaker_threshold", 5),
+                                   config.get("circuit_breaker_reset_seconds", 30),
+                                   config.get("gt_hedge_requests", False))
+        configure_retry_policy(config.get("retry_max_attempts", 3),
+                               config.get("retry_base_delay", 0.5),
+                               config.get("retry_max_delay", 5),
+                               config.get("retry_budget_ratio", 0.2))
         self.bf_prompt = config.get("bf_prompt",
                                     "请根据以下评判标准和数据从多个方面评价用户的游戏水平，注意要结合人设和上下文，保证对话不冲突，1.K/D(击杀/死亡比):薯薯:小于1，Pro:大于2.5说明： 高KD是Pro哥基础，但单纯KD高可能是架枪蹲人。Pro哥的KD是在高强度突击和救点中打出来的。2.KPM(每分钟击杀):薯薯:小于0.7，Pro:大于1.5说明： 这是衡量你击杀效率的关键指标。KPM低而KD高，大概率是喜欢偷偷地躲起来蹲人，可以适当调侃这些胆小鬼。3.命中率&爆头率这个指标要综合判断，不能直接根据这个参数判断是不是pro哥命中率要根据枪械来看，喷子命中即使超过100%也是正常的，其他种类枪械正常玩家也不会太高爆头率狙击枪超过90%也可以算正常玩家过低的爆头率可能是载具玩家两个指标都超过50%很有可能是挂钩，遇到挂钩直接开喷，谨慎使用，枪械数据量较少时可能是巧合4.急救数神医专属指标5.载具注意击杀和摧毁，击杀特别多但摧毁特别少的那就是捞薯凶手、恐怖铁皮人(只能用来调侃坦克)补充：可以根据玩家使用武器、载具、飞机的偏好分为不同的Pro哥")
 
         self.bf_data_path = StarTools.get_data_dir("battleField_tool_plugin")
+        self.template_auto_reload = config.get("template_auto_reload", False)
         self.db = BattleFieldDataBase(self.bf_data_path)  # 初始化数据库
         self.db_service = BattleFieldDBService(self.db)  # 初始化数据库服务
         self._session = None
+        self.http_store = None
+        self.image_cache_manager = None
+        self._warmup_task = None
         self.default_platform = "pc"  # 默认平台
         self.plugin_logic = BattlefieldPluginLogic(self.db_service, self.default_game, self.timeout_config,
                                                    self.img_quality,
-                                                   self._session, self.bf_prompt, self.default_platform)
+                                                   self._session, self.bf_prompt, self.default_platform,
+                                                   self.render_cache_ttl)
         self.api_handlers = ApiHandlers(self.plugin_logic, self.html_render, self.timeout_config, self.ssc_token,
-                                        self._session, self.wake_prefix)
+                                        self._session, self.wake_prefix, self.render_max_concurrency,
+                                        self.render_max_queue)
 
     async def initialize(self):
         """可选择实现异步的插件初始化方法，当实例化该插件类之后会自动调用该方法。"""
-        self._session = aiohttp.ClientSession()
+        self._session = init_shared_session()  # 所有请求共享的连接池
         await self.db.initialize()  # 添加数据库初始化调用
+        self.http_store = HttpResponseStore(self.db_service)  # 持久化接口响应
+        await self.http_store.prune()
+        self.api_handlers.http_store = self.http_store
+        # 常量模块和图片工具较重，插件加载时不导入
+        from .constants.battlefield_constants import TemplateConstants
+        from .core.image_util import image_store
+        # 模板编译结果缓存到数据目录，重启后直接加载
+        TemplateConstants.configure(self.bf_data_path / "template_cache", self.template_auto_reload)
+        await asyncio.get_running_loop().run_in_executor(None, image_store.load)  # 读取图片索引
+        # 后台定期清理图片缓存，静态资源和预热的图片不参与淘汰，每次清理后输出运行统计
+        self.image_cache_manager = ImageCacheManager(image_store, self.image_cache_max_mb * 1024 * 1024,
+                                                     self.image_cache_sweep_minutes * 60, self._pinned_image_urls,
+                                                     after_sweep=self._log_runtime_stats)
+        self.image_cache_manager.start()
+        if self.image_warmup:
+            from .core.image_warmup import warm_up_images  # 预热需要的实体类较重，按需导入
+            self._warmup_task = asyncio.ensure_future(warm_up_images())
         self.plugin_logic._session = self._session  # 更新handlers中的session
         self.api_handlers._session = self._session  # 更新api_handlers中的session
 
+    @staticmethod
+    def _pinned_image_urls() -> list:
+        """不参与淘汰的图片：预热的图片和默认头像"""
+        from .constants.battlefield_constants import ImageUrls
+        from .core.image_warmup import collect_warmup_urls  # 第一次清理时才调用，不影响启动
+        return list(ImageUrls.get_all_static_urls().values()) + collect_warmup_urls()
+
+    def _log_runtime_stats(self):
+        """输出渲染调度、缓存以及请求重试、熔断和限流的统计信息"""
+        from .core.image_util import get_image_cache_stats
+        request_stats = get_request_stats()
+        logger.info(f"Battlefield Tool 运行统计: 渲染调度{self.api_handlers.render_scheduler.stats()}，"
+                    f"渲染缓存{self.plugin_logic.render_cache.stats()}，"
+                    f"图片缓存{get_image_cache_stats()}，重试{request_stats['retry']}，"
+                    f"熔断{request_stats['breakers']}，限流{request_stats['rate_limiters']}")
+
+    def _page_hints(self, event: AstrMessageEvent, command: str, request_data, total_pages: int) -> list:
+        """生成列表类查询的翻页提示，没有下一页时返回空列表"""
+        next_page = self.plugin_logic.build_next_page_command(command, request_data, total_pages)
+        if not next_page:
+            return []
+        prefix = ""
+        if len(self.wake_prefix) > 0:
+            prefix = self.wake_prefix[0]
+        return [event.plain_result(f"可以用下面的指令翻页，当前页:{request_data.page}/{total_pages}"),
+                event.plain_result(f"{prefix}{next_page}")]
+
+    async def _paged_results(self, event: AstrMessageEvent, command: str, request_data, results):
+        """输出列表类查询的图片和翻页提示，results产出(图片URL, 总页数)，接口返回错误时产出的是文字消息"""
+        async for item in results:
+            if not isinstance(item, tuple):
+                yield item
+                continue
+            result, total_pages = item
+            yield event.image_result(result)
+            for hint in self._page_hints(event, command, request_data, total_pages):
+                yield hint
+
     @filter.command("stat")
     @handle_exceptions()
     async def bf_stat(self, event: AstrMessageEvent):
@@ -87,11 +169,11 @@ class BattlefieldTool(Star):
         logger.info(f"玩家id:{request_data.ea_name}，查询游戏:{request_data.game}")
 
         if request_data.game in ["bf2042", "bf6"]:
-            async for result in self.api_handlers.handle_btr_game(event, request_data, "weapons"):
-                yield event.image_result(result)
+            results = self.api_handlers.handle_btr_game(event, request_data, "weapons")
         else:
-            async for result in self.api_handlers.fetch_gt_data(event, request_data, "weapons", "weapons"):
-                yield event.image_result(result)
+            results = self.api_handlers.fetch_gt_data(event, request_data, "weapons", "weapons")
+        async for result in self._paged_results(event, "武器", request_data, results):
+            yield result
 
     @filter.command("vehicles", alias=["载具","vehicle"])
     @handle_exceptions()
@@ -105,11 +187,11 @@ class BattlefieldTool(Star):
 
         logger.info(f"玩家id:{request_data.ea_name}，查询游戏:{request_data.game}")
         if request_data.game in ["bf2042", "bf6"]:
-            async for result in self.api_handlers.handle_btr_game(event, request_data, "vehicles"):
-                yield event.image_result(result)
+            results = self.api_handlers.handle_btr_game(event, request_data, "vehicles")
         else:
-            async for result in self.api_handlers.fetch_gt_data(event, request_data, "vehicles", "vehicles"):
-                yield event.image_result(result)
+            results = self.api_handlers.fetch_gt_data(event, request_data, "vehicles", "vehicles")
+        async for result in self._paged_results(event, "载具", request_data, results):
+            yield result
 
     @filter.command("soldiers", alias=["士兵","soldier"])
     @handle_exceptions()
@@ -126,8 +208,9 @@ class BattlefieldTool(Star):
             raise GameNotSupportedForOperationError(request_data.game, "士兵查询", ['bf2042', 'bf6'])
 
         logger.info(f"玩家id:{request_data.ea_name}，查询游戏:{request_data.game}")
-        async for result in self.api_handlers.handle_btr_game(event, request_data, "soldiers"):
-            yield event.image_result(result)
+        results = self.api_handlers.handle_btr_game(event, request_data, "soldiers")
+        async for result in self._paged_results(event, "士兵", request_data, results):
+            yield result
 
     @filter.command("recent", alias=["最近", "战报"])
     @handle_exceptions()
@@ -185,7 +268,7 @@ class BattlefieldTool(Star):
         )
 
         async for result in await self.plugin_logic.process_api_response(
-                event, servers_data, "servers", request_data.game, self.html_render
+                event, servers_data, "servers", request_data.game, self.api_handlers.render_func_for(event)
         ):
             yield event.image_result(result)
 
@@ -292,26 +375,29 @@ class BattlefieldTool(Star):
 示例: {prefix}stat ExamplePlayer,game=bf1
 
 4. 武器统计
-命令: {prefix}weapons [name],game=[游戏代号],type=[类型] 或 {prefix}武器 [name],game=[游戏代号],type=[类型]
+命令: {prefix}weapons [name],game=[游戏代号],type=[类型],page=[页码] 或 {prefix}武器 [name],game=[游戏代号],type=[类型],page=[页码]
 参数:
   name - EA账号名(可选，已绑定则可不填)
   game - 游戏代号(可选)
   type - 武器类型过滤(可选，如：突击步枪、狙击步枪、冲锋枪等)
-示例: {prefix}weapons ExamplePlayer,game=bfv,type=突击步枪
+  page - 页码(可选，默认第1页，每页20条，最多25页)
+示例: {prefix}weapons ExamplePlayer,game=bfv,type=突击步枪,page=2
 
 5. 载具统计
-命令: {prefix}vehicles [name],game=[游戏代号],type=[类型] 或 {prefix}载具 [name],game=[游戏代号],type=[类型]
+命令: {prefix}vehicles [name],game=[游戏代号],type=[类型],page=[页码] 或 {prefix}载具 [name],game=[游戏代号],type=[类型],page=[页码]
 参数:
   name - EA账号名(可选，已绑定则可不填)
   game - 游戏代号(可选)
   type - 载具类型过滤(可选，如：地载、空载、旋翼等)
+  page - 页码(可选，默认第1页，每页20条，最多25页)
 示例: {prefix}vehicles ExamplePlayer,type=地载
 
 6. 士兵查询
-命令: {prefix}soldier [name],game=bf2042 或 {prefix}士兵 [name],game=bf2042
+命令: {prefix}soldier [name],game=bf2042,page=[页码] 或 {prefix}士兵 [name],game=bf2042,page=[页码]
 参数:
   name - EA账号名(可选，已绑定则可不填)
   game - 游戏代号(必须为bf2042、bf6)
+  page - 页码(可选，默认第1页，每页20条，最多25页)
 示例: {prefix}soldier ExamplePlayer,game=bf2042
 
 6. 战报查询
@@ -334,6 +420,13 @@ class BattlefieldTool(Star):
 
     async def terminate(self):
         """可选择实现异步的插件销毁方法，当插件卸载/停用时会调用。"""
-        if self._session:
-            await self._session.close()
+        self._log_runtime_stats()
+        if self.http_store:
+            await self.http_store.close()
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self.image_cache_manager:
+            await self.image_cache_manager.stop()
+            await self.image_cache_manager.store.flush()
+        await close_shared_session()
         await self.db.close()
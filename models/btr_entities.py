@@ -231,6 +231,11 @@ class PlayerStats:
 
         return f"http://tutu.shooting-star-c.top/i/2025/10/13/t_ui_rank_{formatted_level}_lg.png"
 
+    @staticmethod
+    def get_all_rank_images() -> List[str]:
+        """获取所有等级档位的段位图片URL"""
+        return list(dict.fromkeys(PlayerStats.get_rank_image(level) for level in range(0, 5001)))
+
     def to_llm_text(self) -> str:
         """预处理 PlayerStats 方便 llm 理解"""
         return f"""用户{self.user_name}生涯总共击杀{self.kills}名敌军，总击杀世界排名{self.kills_percentile}%，击杀死亡比值(K/D):{self.kill_death},平均每分钟击杀(KPM):{self.kills_per_minute}，胜场:{self.wins}，急救了{self.revives}位士兵，爆头率：{self.headshot_percentage},总游玩时间，{self.hours_played}小时，破坏了{self.vehicles_destroyed}辆载具。"""
@@ -311,12 +316,16 @@ class Weapon:
             mastery_level="",
         )
 
+    @staticmethod
+    def get_image_url(data: Dict[str, Any]) -> str:
+        """获取bf6数据中的图标URL，用于构建实例前批量获取图片"""
+        return Weapon._get_category(data.get("metadata").get("imageUrl", ""))
+
     @classmethod
-    async def from_bf6_dict(cls, data: Dict[str, Any]):
-        image_url = Weapon._get_category(data.get("metadata").get("imageUrl", ""))
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    def from_bf6_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6字典创建 Weapon 实例"""
+        image_url = Weapon.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             weapon_name=data.get("metadata").get("name", "--"),
             category=Weapon._get_category(data.get("metadata").get("categoryName", "--")),
@@ -341,11 +350,10 @@ class Weapon:
             hipfire_kills="",
         )
     @classmethod
-    async def from_bf6_matches_dict(cls, data: Dict[str, Any]):
-        image_url = Weapon._get_category(data.get("metadata").get("imageUrl", ""))
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    def from_bf6_matches_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6战报字典创建 Weapon 实例"""
+        image_url = Weapon.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             weapon_name=data.get("metadata").get("name", "--"),
             category=Weapon._get_category(data.get("metadata").get("categoryName", "--")),
@@ -465,12 +473,16 @@ class Vehicle:
             dmg_per_min=data.get("stats").get("dmgPerMin").get("displayValue", "--"),
         )
 
+    @staticmethod
+    def get_image_url(data: Dict[str, Any]) -> str:
+        """获取bf6数据中的图标URL，用于构建实例前批量获取图片"""
+        return data.get("metadata").get("imageUrl", "")
+
     @classmethod
-    async def from_bf6_dict(cls, data: Dict[str, Any]):
-        image_url = data.get("metadata").get("imageUrl", "")
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    def from_bf6_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6字典创建 Vehicle 实例"""
+        image_url = Vehicle.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             vehicle_name=Vehicle._get_vehicle_category(data.get("metadata").get("name", "--")),
             category=Vehicle._get_category(data.get("metadata").get("categoryName", "--")),
@@ -496,11 +508,10 @@ class Vehicle:
             dmg_per_min="",
         )
     @classmethod
-    async def from_bf6_matches_dict(cls, data: Dict[str, Any]):
-        image_url = data.get("metadata").get("imageUrl", "")
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    def from_bf6_matches_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6战报字典创建 Vehicle 实例"""
+        image_url = Vehicle.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             vehicle_name=Vehicle._get_vehicle_category(data.get("metadata").get("name", "--")),
             category=Vehicle._get_category(data.get("metadata").get("categoryName", "--")),
@@ -634,12 +645,16 @@ class Soldier:
             deaths=data.get("stats").get("deaths").get("displayValue", "--"),
         )
 
+    @staticmethod
+    def get_image_url(data: Dict[str, Any]) -> str:
+        """获取bf6数据中的图标URL，用于构建实例前批量获取图片"""
+        return data.get("metadata").get("imageUrl", "")
+
     @classmethod
-    async def from_bf6_dict(cls, data: Dict[str, Any]):
-        image_url = data.get("metadata").get("imageUrl", "")
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    def from_bf6_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6字典创建 Soldier 实例"""
+        image_url = Soldier.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             soldier_name=Soldier._get_category(data.get("metadata").get("name", "--")),
             category="",
@@ -656,11 +671,10 @@ class Soldier:
         )
 
     @classmethod
-    async def from_bf6_matches_dict(cls, data: Dict[str, Any]):
-        image_url = data.get("metadata").get("imageUrl", "")
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    def from_bf6_matches_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6战报字典创建 Soldier 实例"""
+        image_url = Soldier.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             soldier_name=Soldier._get_category(data.get("metadata").get("name", "--")),
             category="",
@@ -745,13 +759,16 @@ class Modes:
         self.matches_played = matches_played
         self.kills_per_minute = kills_per_minute
 
-    @classmethod
-    async def from_bf6_matches_dict (cls, data: Dict[str, Any]):
-        image_url = data.get("metadata").get("imageUrl", "")
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    @staticmethod
+    def get_image_url(data: Dict[str, Any]) -> str:
+        """获取bf6数据中的图标URL，用于构建实例前批量获取图片"""
+        return data.get("metadata").get("imageUrl", "")
 
+    @classmethod
+    def from_bf6_matches_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6战报字典创建 Modes 实例"""
+        image_url = Modes.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             mode_name=Modes._get_category(data.get("metadata").get("name", "--")),
             image_url=image_url,
@@ -809,13 +826,16 @@ class Maps:
         self.matches_lost = matches_lost
         self.wl_percentage = wl_percentage
 
-    @classmethod
-    async def from_bf6_matches_dict (cls, data: Dict[str, Any]):
-        image_url = data.get("metadata").get("imageUrl", "")
-        image = ""
-        if image_url:
-            image = await get_image_base64(image_url)
+    @staticmethod
+    def get_image_url(data: Dict[str, Any]) -> str:
+        """获取bf6数据中的图标URL，用于构建实例前批量获取图片"""
+        return data.get("metadata").get("imageUrl", "")
 
+    @classmethod
+    def from_bf6_matches_dict(cls, data: Dict[str, Any], images: Optional[Dict[str, str]] = None):
+        """从bf6战报字典创建 Maps 实例"""
+        image_url = Maps.get_image_url(data)
+        image = (images or {}).get(image_url, "")
         return cls(
             map_name=Maps._get_category(data.get("metadata").get("name", "--")),
             image_url=image_url,
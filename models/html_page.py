@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class HtmlPage:
+    """构建好的页面及其预估高度"""
+    html: str
+    height: int  # 预估的页面高度(像素)，用于截图裁剪
+    page: int = 1  # 当前页码
+    total_pages: int = 1  # 总页数
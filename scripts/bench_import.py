@@ -0,0 +1,70 @@
+"""
+插件导入耗时测试
+在独立的子进程中多次导入插件主模块，统计耗时以及导入后已加载的重模块，
+用于确认常量、模板、实体类和图片生成器没有在插件加载时被导入。
+
+用法(需要能导入astrbot的环境，一般在AstrBot根目录下执行):
+    python data/plugins/astrbot_plugin_battlefield_tool/scripts/bench_import.py -n 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 应在第一次查询时才导入的模块
+HEAVY_MODULES = [
+    "constants.battlefield_constants",
+    "core.image_util",
+    "core.gametool.gt_template",
+    "core.gametool.gt_image_generator",
+    "core.gametool.gt_llm",
+    "core.btr.btr_template",
+    "core.btr.btr_image_generator",
+    "core.btr.btr_llm",
+    "core.image_warmup",
+    "models.btr_entities",
+    "models.gt_entities",
+]
+
+CHILD_CODE = """
+import importlib, json, sys, time
+sys.path.insert(0, {search_path!r})
+start = time.perf_counter()
+importlib.import_module({package!r} + ".main")
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if {package!r} + "." + name in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "loaded": loaded}}))
+"""
+
+
+def run_once(search_path: str, package: str) -> dict:
+    """在新的解释器中导入一次插件"""
+    code = CHILD_CODE.format(search_path=search_path, package=package, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测试插件导入耗时")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="导入次数")
+    args = parser.parse_args()
+
+    search_path, package = os.path.split(PLUGIN_DIR)
+    results = [run_once(search_path, package) for _ in range(args.runs)]
+    timings = [r["elapsed"] * 1000 for r in results]
+    print(f"导入{package}.main {args.runs}次: "
+          f"最短{min(timings):.1f}ms, 中位数{statistics.median(timings):.1f}ms, 最长{max(timings):.1f}ms")
+    loaded = results[0]["loaded"]
+    if loaded:
+        print(f"加载时已导入的重模块: {', '.join(loaded)}")
+    else:
+        print("加载时没有导入常量、模板、实体类和图片生成器")
+
+
+if __name__ == "__main__":
+    main()
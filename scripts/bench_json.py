@@ -0,0 +1,144 @@
+"""
+JSON解码耗时测试
+对比标准库json、orjson以及插件使用的解码函数解码gametools大响应的耗时，
+并测量同步解码和线程池解码时事件循环的最长停顿。
+
+默认使用按gametools all接口结构生成的数据(数百个武器和载具)，
+也可以用--fixture指定保存下来的真实响应文件。
+
+用法:
+    python scripts/bench_json.py
+    python scripts/bench_json.py --fixture bfv_all.json -n 200
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import time
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_json_util():
+    """直接按文件加载json_util，不需要导入插件和astrbot"""
+    spec = importlib.util.spec_from_file_location("json_util", os.path.join(PLUGIN_DIR, "core", "json_util.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_fixture(weapons: int = 400, vehicles: int = 200, seed: int = 0) -> bytes:
+    """生成与gametools all接口结构相近的响应"""
+    rng = random.Random(seed)
+
+    def item(kind: str, index: int) -> dict:
+        kills = rng.randint(0, 20000)
+        return {
+            f"{kind}Name": f"{kind.upper()}-{index}",
+            "type": rng.choice(["突击步枪", "冲锋枪", "轻机枪", "狙击步枪", "霰弹枪", "手枪"]),
+            "image": f"https://cdn.gametools.network/{kind}s/bfv/{index:04x}.png",
+            "id": f"{index:08x}",
+            "kills": kills,
+            "killsPerMinute": round(rng.random() * 3, 2),
+            "damage": kills * rng.randint(80, 120),
+            "headshotKills": rng.randint(0, kills),
+            "headshots": f"{rng.random() * 60:.2f}%",
+            "shotsFired": kills * rng.randint(3, 9),
+            "shotsHit": kills * rng.randint(1, 3),
+            "accuracy": f"{rng.random() * 50:.2f}%",
+            "timeEquipped": rng.randint(0, 500000),
+            "hitVKills": round(rng.random() * 10, 2),
+            "destroyed": rng.randint(0, 500),
+        }
+
+    body = {
+        "userName": "benchmark_player",
+        "id": 123456789,
+        "avatar": "https://secure.download.dm.origin.com/production/avatar/prod/1/599/208x208.JPEG",
+        **{f"stat_{i}": rng.random() * 1000 for i in range(120)},
+        "weapons": [item("weapon", i) for i in range(weapons)],
+        "vehicles": [item("vehicle", i) for i in range(vehicles)],
+        "classes": [item("class", i) for i in range(8)],
+        "gamemodes": [item("mode", i) for i in range(12)],
+    }
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def time_it(func, data: bytes, runs: int) -> float:
+    """返回单次调用的平均耗时(毫秒)"""
+    func(data)
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(data)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+async def max_loop_stall(decode, data: bytes, runs: int) -> float:
+    """解码期间事件循环的最长停顿(毫秒)"""
+    stall = 0.0
+    stop = False
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while not stop:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.001)
+            last = now
+
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    for _ in range(runs):
+        await decode(data)
+        await asyncio.sleep(0)
+    stop = True
+    await task
+    return stall * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测试JSON解码耗时")
+    parser.add_argument("--fixture", action="append", help="保存下来的响应文件，可以指定多次")
+    parser.add_argument("-n", "--runs", type=int, default=100, help="每项测试的解码次数")
+    args = parser.parse_args()
+
+    json_util = load_json_util()
+    if args.fixture:
+        fixtures = {}
+        for path in args.fixture:
+            with open(path, "rb") as f:
+                fixtures[os.path.basename(path)] = f.read()
+    else:
+        fixtures = {"synthetic_all": make_fixture()}
+
+    decoders = {"json": json.loads, "json_util": json_util.loads}
+    if json_util.orjson is not None:
+        decoders["orjson"] = json_util.orjson.loads
+    print(f"json_util当前使用: {json_util.DECODER_NAME}，线程池解码阈值: {json_util.OFFLOAD_THRESHOLD // 1024}KB")
+
+    for name, data in fixtures.items():
+        print(f"\n{name}: {len(data) / 1024:.1f}KB")
+        baseline = None
+        for decoder_name, func in decoders.items():
+            cost = time_it(func, data, args.runs)
+            baseline = baseline or cost
+            print(f"  {decoder_name:<10}{cost:8.3f}ms  {baseline / cost:5.2f}x")
+
+        async def sync_decode(body):
+            json.loads(body)
+
+        async def offloaded_decode(body):
+            await json_util.loads_async(body)
+
+        runs = max(1, args.runs // 10)
+        sync_stall = asyncio.run(max_loop_stall(sync_decode, data, runs))
+        async_stall = asyncio.run(max_loop_stall(offloaded_decode, data, runs))
+        print(f"  事件循环最长停顿: 同步json {sync_stall:.2f}ms, loads_async {async_stall:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+编译模板使用的Tailwind样式
+扫描template/btr和template/gametool中的模板，只生成用到的样式，输出到template/tailwind.css。
+插件启动时读取该文件并内联到渲染的HTML中，渲染时不再加载Tailwind CDN脚本；
+文件不存在时模板仍使用CDN。修改模板中的class后需要重新执行本脚本并提交生成的文件。
+
+优先使用pip安装的独立Tailwind命令行(不需要Node.js)，没有时使用npx:
+    pip install tailwindcss-bin
+
+用法:
+    python scripts/build_css.py
+    python scripts/build_css.py --check  # 只检查tailwind.css是否需要重新生成
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(PLUGIN_DIR, "template")
+INPUT_FILE = os.path.join(TEMPLATE_DIR, "tailwind.input.css")
+OUTPUT_FILE = os.path.join(TEMPLATE_DIR, "tailwind.css")
+
+# tailwindcss-bin提供的独立命令行
+STANDALONE_COMMAND = "tailwindcss-bin"
+NPX_PACKAGE = "@tailwindcss/cli@4"
+
+
+def tailwind_command() -> list:
+    """查找Tailwind命令行"""
+    standalone = shutil.which(STANDALONE_COMMAND)
+    if standalone is not None:
+        return [standalone]
+    npx = shutil.which("npx")
+    if npx is not None:
+        return [npx, "--yes", NPX_PACKAGE]
+    sys.exit("未找到Tailwind命令行，请执行pip install tailwindcss-bin或安装Node.js")
+
+
+def build(output: str):
+    # tailwind.input.css中的@source路径相对于模板目录
+    subprocess.run(
+        tailwind_command() + ["-i", INPUT_FILE, "-o", output, "--minify"],
+        check=True, cwd=TEMPLATE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="编译模板使用的Tailwind样式")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help="输出文件")
+    parser.add_argument("--check", action="store_true", help="检查输出文件是否与模板一致，不一致时返回非0")
+    args = parser.parse_args()
+
+    if not args.check:
+        build(args.output)
+        print(f"已生成{args.output}，大小{os.path.getsize(args.output) / 1024:.1f}KB")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh = os.path.join(tmp, "tailwind.css")
+        build(fresh)
+        if not os.path.exists(args.output) or read(args.output) != read(fresh):
+            sys.exit(f"{args.output}已过期，请执行python scripts/build_css.py重新生成")
+    print(f"{args.output}与模板一致")
+
+
+if __name__ == "__main__":
+    main()